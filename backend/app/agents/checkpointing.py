@@ -0,0 +1,171 @@
+# backend/app/agents/checkpointing.py
+
+import asyncio
+import os
+import time
+import uuid
+from typing import Callable, Optional
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from app.core.config import settings
+
+_checkpointer = None
+_prune_task = None
+
+
+class RunNotResumable(Exception):
+    """The run cannot continue from its checkpoint, e.g. because an input it needs is gone."""
+
+
+async def get_checkpointer() -> AsyncSqliteSaver:
+    """
+    Returns the process-wide LangGraph checkpointer. Created on first use
+    because the saver binds to the running event loop.
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        directory = os.path.dirname(settings.GRAPH_CHECKPOINT_PATH)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # The saver opens the connection itself on first use.
+        _checkpointer = AsyncSqliteSaver(aiosqlite.connect(settings.GRAPH_CHECKPOINT_PATH))
+    return _checkpointer
+
+
+def graph_run_config(graph_name: str, consultation_id: int, run_id: str) -> dict:
+    """Checkpoints are kept per graph, consultation and run."""
+    return {"configurable": {"thread_id": f"{graph_name}:{consultation_id}:{run_id}"}}
+
+
+def _checkpoint_id(config: dict) -> str:
+    return config["configurable"]["checkpoint_id"]
+
+
+async def _history(runnable, config: dict) -> list:
+    """
+    The checkpoints leading to the run's latest state, oldest first. Branches
+    abandoned by an earlier resume are left out.
+    """
+    snapshots = [snapshot async for snapshot in runnable.aget_state_history(config)]
+    if not snapshots:
+        raise LookupError(f"No checkpoints found for {config['configurable']['thread_id']}.")
+    by_id = {_checkpoint_id(snapshot.config): snapshot for snapshot in snapshots}
+    lineage = []
+    snapshot = snapshots[0]
+    while snapshot is not None:
+        lineage.append(snapshot)
+        parent = snapshot.parent_config
+        snapshot = by_id.get(_checkpoint_id(parent)) if parent else None
+    lineage.reverse()
+    return lineage
+
+
+async def resume_run(runnable, config: dict, check: Optional[Callable] = None) -> dict:
+    """
+    Continues a run from its last good checkpoint. Nodes report failures by
+    setting `error` in the state, so the run is forked from the checkpoint just
+    before the first error and the failed node runs again; the nodes before it
+    are not repeated. A run that was interrupted (e.g. the process died) simply
+    continues, and a run that completed cleanly is returned as is. `check` is
+    called with the snapshot the run would continue from and may raise
+    RunNotResumable.
+    """
+    snapshots = await _history(runnable, config)
+    for index, snapshot in enumerate(snapshots):
+        if snapshot.values.get("error"):
+            if index == 0:
+                break
+            if check:
+                check(snapshots[index - 1])
+            return await runnable.ainvoke(None, snapshots[index - 1].config)
+    latest = snapshots[-1]
+    if latest.next and not latest.values.get("error"):
+        if check:
+            check(latest)
+        return await runnable.ainvoke(None, config)
+    return latest.values
+
+
+async def run_outputs(runnable, config: dict) -> list:
+    """
+    What each completed step of a run wrote to the state, for debugging: the
+    difference between consecutive checkpoints, labelled with the node(s) that ran.
+    """
+    snapshots = await _history(runnable, config)
+    steps = []
+    for previous, current in zip(snapshots, snapshots[1:]):
+        steps.append({
+            "step": current.metadata.get("step"),
+            "nodes": list(previous.next),
+            "created_at": current.created_at,
+            "output": {
+                key: value for key, value in current.values.items()
+                if previous.values.get(key) != value
+            },
+        })
+    return steps
+
+
+def _checkpoint_id_at(timestamp: float) -> str:
+    """
+    The smallest checkpoint id LangGraph could issue at `timestamp`. Its ids are
+    UUIDv6, which start with the creation time, so they sort by age as strings.
+    """
+    ticks = int(timestamp * 10_000_000) + 0x01B21DD213814000  # 100 ns intervals since 1582-10-15
+    value = ((ticks >> 12) & 0xFFFFFFFFFFFF) << 80 | 0x6 << 76 | (ticks & 0x0FFF) << 64
+    return str(uuid.UUID(int=value))
+
+
+async def prune_checkpoints(retention_days: float) -> int:
+    """
+    Deletes every run whose latest checkpoint is older than `retention_days`.
+    Checkpoints hold transcripts and patient context, so they are only kept as
+    long as a failed run is worth resuming. Returns the number of runs deleted.
+    """
+    checkpointer = await get_checkpointer()
+    await checkpointer.setup()
+    cutoff = _checkpoint_id_at(time.time() - retention_days * 86400)
+    async with checkpointer.lock:
+        conn = checkpointer.conn
+        # Overwrite deleted rows instead of leaving them in free pages.
+        await conn.execute("PRAGMA secure_delete = ON")
+        cursor = await conn.execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(checkpoint_id) < ?", (cutoff,)
+        )
+        thread_ids = [(row[0],) for row in await cursor.fetchall()]
+        await conn.executemany("DELETE FROM writes WHERE thread_id = ?", thread_ids)
+        await conn.executemany("DELETE FROM checkpoints WHERE thread_id = ?", thread_ids)
+        await conn.commit()
+    return len(thread_ids)
+
+
+async def _prune_periodically(retention_days: float, interval_seconds: float):
+    while True:
+        try:
+            pruned = await prune_checkpoints(retention_days)
+            if pruned:
+                print(f"Pruned {pruned} graph run(s) older than {retention_days} days from the checkpoints.")
+        except Exception as e:
+            print(f"ERROR: Pruning graph checkpoints failed. Error: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def start_checkpoint_pruning():
+    """Prunes expired runs now and then every GRAPH_CHECKPOINT_PRUNE_INTERVAL_HOURS, until the checkpointer is closed."""
+    global _prune_task
+    if _prune_task is None:
+        _prune_task = asyncio.create_task(_prune_periodically(
+            settings.GRAPH_CHECKPOINT_RETENTION_DAYS, settings.GRAPH_CHECKPOINT_PRUNE_INTERVAL_HOURS * 3600
+        ))
+
+
+async def close_checkpointer():
+    """Closes the checkpoint database; its connection thread would otherwise keep the process alive."""
+    global _checkpointer, _prune_task
+    if _prune_task is not None:
+        _prune_task.cancel()
+        _prune_task = None
+    if _checkpointer is not None:
+        await _checkpointer.conn.close()
+        _checkpointer = None
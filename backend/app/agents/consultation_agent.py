@@ -1,15 +1,18 @@
 # backend/app/agents/consultation_agent.py
 
-from langchain import hub
+from contextvars import ContextVar
+from typing import AsyncIterator
 from langchain.agents import AgentExecutor, create_react_agent
-from langchain_openai import ChatOpenAI
 from langchain.tools import Tool
 from pydantic.v1 import BaseModel, Field
-import asyncio
+import threading
+import time
 
-from app.core.config import settings
-from app.db.session import SessionLocal
-from app.services.consultation_service import ConsultationService
+from app.agents.prompts import REACT_PROMPT
+from app.agents.rag_agent import get_rag_agent
+from app.agents.tools.medical_report_tools import fetch_report_summaries
+from app.services.answer_cache import semantic_answer_cache
+from app.services.llm_gateway import llm_gateway
 
 
 class DetailedQueryInput(BaseModel):
@@ -17,71 +20,57 @@ class DetailedQueryInput(BaseModel):
     question: str = Field(description="The specific question to ask the text reports.")
 
 
+# The consultation the current question is about. Set per call, so one agent
+# executor can serve every consultation concurrently.
+current_consultation_id: ContextVar[int] = ContextVar("current_consultation_id")
+
+# Text after this marker in the ReAct output is the answer shown to the user.
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
 class ConsultationAgent:
     """
     An advanced agent that uses multiple tools to answer questions about a consultation.
+    Built once per process (see `get_consultation_agent`); the only per-call state
+    is the consultation id.
     """
 
-    def __init__(self, consultation_id: int):
-        self.consultation_id = consultation_id
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=settings.OPENAI_API_KEY)
+    def __init__(self):
+        self.llm = llm_gateway.chat("agent", temperature=0)
 
         async def aquery_detailed_reports(question: str) -> str:
-            """Asynchronous wrapper for the detailed query tool."""
+            """Asynchronous detailed query tool."""
             try:
-                from app.agents.rag_agent import RAGAgent
-                rag_agent = RAGAgent(consultation_id=self.consultation_id)
+                rag_agent = get_rag_agent(current_consultation_id.get())
                 answer = await rag_agent.answer_question(question)
                 return answer
             except Exception as e:
                 print(f"Error in detailed query tool: {e}")
                 return "Could not query the detailed text reports. The vector store may not exist for this consultation."
 
-        def sync_detailed_query(question: str) -> str:
-            """Synchronous wrapper for running the async tool."""
-            # This is necessary for the 'func' argument of the Tool.
-            return asyncio.run(aquery_detailed_reports(question))
-
-        # Create a wrapper function that accepts an optional argument (for LangChain compatibility)
-        def get_summaries_wrapper(input_str: str = "") -> str:
-            # Call the function directly without using it as a tool
-            db = SessionLocal()
-            try:
-                consultation_service = ConsultationService(db)
-                reports = consultation_service.get_reports_for_consultation(self.consultation_id)
-                if not reports:
-                    return "No reports have been uploaded for this consultation yet."
-
-                formatted_summaries = []
-                for report in reports:
-                    file_name = report.file_path.split('/')[-1]
-                    summary = report.summary or "No summary available."
-                    formatted_summaries.append(f"Report: {file_name}\nSummary: {summary}")
-
-                return "\n\n".join(formatted_summaries)
-            finally:
-                db.close()
+        # Accepts an optional argument (for LangChain compatibility)
+        async def aget_summaries(input_str: str = "") -> str:
+            return await fetch_report_summaries(current_consultation_id.get())
 
+        # The agent is only driven through ainvoke, so the tools are coroutine-only:
+        # no sync fallbacks that would block the event loop or nest a new one.
         self.tools = [
             Tool(
                 name="get_all_report_summaries",
-                func=get_summaries_wrapper,
-                description="Use this tool to get a list of AI-generated summaries for ALL reports (both text and images) associated with the consultation. Best for broad questions like 'summarize the findings' or for questions about images."
+                func=None,
+                coroutine=aget_summaries,
+                description="Use this tool to get a consolidated AI-generated summary of ALL reports (both text and images) and the SOAP note of the consultation. Best for broad questions like 'summarize the findings' or for questions about images."
             ),
-            # --- This is the key change ---
-            # The Tool constructor requires a 'func' argument, even if a 'coroutine' is provided.
-            # We provide both the synchronous and asynchronous versions.
             Tool(
                 name="query_detailed_text_reports",
-                func=sync_detailed_query,
+                func=None,
                 coroutine=aquery_detailed_reports,
                 description="Use this tool ONLY when you need to find specific, detailed information or direct quotes from within text-based documents (like PDFs). Do not use this for general summaries or for questions about images.",
                 args_schema=DetailedQueryInput
             )
         ]
 
-        prompt = hub.pull("hwchase17/react")
-        agent = create_react_agent(self.llm, self.tools, prompt)
+        agent = create_react_agent(self.llm, self.tools, REACT_PROMPT)
 
         self.agent_executor = AgentExecutor(
             agent=agent,
@@ -90,15 +79,92 @@ class ConsultationAgent:
             handle_parsing_errors="Check your output and make sure it conforms to the Action/Action Input format."
         )
 
-    async def answer_question(self, question: str) -> str:
+    async def answer_question(self, consultation_id: int, question: str) -> str:
         """
-        Invokes the agent asynchronously to answer a question.
+        Invokes the agent asynchronously to answer a question about a consultation.
+        Near-identical questions about an unchanged consultation are answered
+        from the semantic answer cache.
         """
+        lookup = await semantic_answer_cache.lookup(consultation_id, question)
+        if lookup.answer is not None:
+            return lookup.answer
+
         contextual_question = (
-            f"You are working on the case for consultation ID {self.consultation_id}. "
+            f"You are working on the case for consultation ID {consultation_id}. "
             f"The user's question is: {question}"
         )
 
-        response = await self.agent_executor.ainvoke({"input": contextual_question})
-        return response.get("output", "I could not find an answer.")
+        started = time.perf_counter()
+        token = current_consultation_id.set(consultation_id)
+        try:
+            response = await self.agent_executor.ainvoke({"input": contextual_question})
+        finally:
+            current_consultation_id.reset(token)
+
+        answer = response.get("output")
+        if not answer:
+            return "I could not find an answer."
+        semantic_answer_cache.store(lookup, answer, time.perf_counter() - started)
+        return answer
+
+    async def stream_answer(self, consultation_id: int, question: str) -> AsyncIterator[dict]:
+        """
+        Streams the agent's work as events: `step` when a tool is called,
+        `observation` when it returns, `token` for each piece of the final answer
+        as the model writes it, and a closing `final` event with the full answer.
+        """
+        lookup = await semantic_answer_cache.lookup(consultation_id, question)
+        if lookup.answer is not None:
+            yield {"type": "final", "answer": lookup.answer, "cached": True}
+            return
+
+        contextual_question = (
+            f"You are working on the case for consultation ID {consultation_id}. "
+            f"The user's question is: {question}"
+        )
 
+        started = time.perf_counter()
+        answer = None
+        # Text generated so far per LLM run, and how much of it was already sent as tokens.
+        run_text, run_sent = {}, {}
+        token = current_consultation_id.set(consultation_id)
+        try:
+            async for event in self.agent_executor.astream_events({"input": contextual_question}, version="v2"):
+                kind = event["event"]
+                if kind == "on_tool_start":
+                    yield {"type": "step", "tool": event["name"], "input": event["data"].get("input")}
+                elif kind == "on_tool_end":
+                    yield {"type": "observation", "tool": event["name"], "output": str(event["data"].get("output"))}
+                elif kind == "on_chat_model_stream":
+                    run_id = event["run_id"]
+                    text = run_text.get(run_id, "") + (event["data"]["chunk"].content or "")
+                    run_text[run_id] = text
+                    marker_at = text.find(FINAL_ANSWER_MARKER)
+                    if marker_at >= 0:
+                        sent = run_sent.get(run_id, marker_at + len(FINAL_ANSWER_MARKER))
+                        if len(text) > sent:
+                            yield {"type": "token", "text": text[sent:]}
+                            run_sent[run_id] = len(text)
+                elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+                    answer = (event["data"].get("output") or {}).get("output")
+        finally:
+            current_consultation_id.reset(token)
+
+        if not answer:
+            yield {"type": "final", "answer": "I could not find an answer.", "cached": False}
+            return
+        semantic_answer_cache.store(lookup, answer, time.perf_counter() - started)
+        yield {"type": "final", "answer": answer, "cached": False}
+
+
+_consultation_agent = None
+_consultation_agent_lock = threading.Lock()
+
+
+def get_consultation_agent() -> ConsultationAgent:
+    """Returns the process-wide consultation agent, building it on first use."""
+    global _consultation_agent
+    with _consultation_agent_lock:
+        if _consultation_agent is None:
+            _consultation_agent = ConsultationAgent()
+        return _consultation_agent
@@ -1,16 +1,25 @@
 # backend/app/agents/graph_builder.py
 
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, Annotated, List
+from typing import TypedDict, Annotated, List, AsyncIterator, Optional
 import operator
-from app.agents.nodes.scribe_nodes import ScribeNodes
+import os
+import uuid
+from app.agents.checkpointing import RunNotResumable, get_checkpointer, graph_run_config, resume_run, run_outputs
+from app.agents.nodes.scribe_nodes import ScribeNodes, SCRIBE_MODES
+from app.core.config import settings
 # --- New for Phase 5 ---
 from app.agents.nodes.diagnosis_nodes import DiagnosisNodes
 
 class ScribeState(TypedDict):
     """State for the Scribe agent."""
     consultation_id: int
+    run_id: str
     audio_file_path: str
+    scribe_mode: str
+    speech_pcm_path: str
+    speech_trimmed: bool
+    audio_stats: dict
     transcription: str
     structured_summary: dict
     final_note: str
@@ -20,49 +29,174 @@ class ScribeState(TypedDict):
 class DdxState(TypedDict):
     """State for the Differential Diagnosis agent."""
     consultation_id: int
+    run_id: str
+    force: bool
+    defer_save: bool
     patient_data_context: str
+    context_stats: dict
+    context_fingerprint: str
+    cache_hit: bool
     ddx_result: str
     error: str
 
 class AgentGraphs:
     """
     Builds and compiles all LangGraph agents for the application.
+    Graphs are compiled on first use with the shared checkpointer, so every run
+    is checkpointed after each node and a failed run can be resumed.
     """
     def __init__(self):
         # Scribe Agent
         self.scribe_workflow = StateGraph(ScribeState)
         self._build_scribe_graph()
-        self.scribe_agent_runnable = self.scribe_workflow.compile()
 
         # DDx Agent
         self.ddx_workflow = StateGraph(DdxState)
         self._build_ddx_graph()
-        self.ddx_agent_runnable = self.ddx_workflow.compile()
+
+        self._workflows = {"scribe": self.scribe_workflow, "ddx": self.ddx_workflow}
+        self._runnables = {}
+
+    async def get_runnable(self, graph_name: str):
+        if graph_name not in self._runnables:
+            checkpointer = await get_checkpointer()
+            self._runnables[graph_name] = self._workflows[graph_name].compile(checkpointer=checkpointer)
+        return self._runnables[graph_name]
 
     def _build_scribe_graph(self):
+        # Fail at startup rather than on the first recording that falls back to the default.
+        if settings.SCRIBE_MODE not in SCRIBE_MODES:
+            raise ValueError(f"Unknown SCRIBE_MODE '{settings.SCRIBE_MODE}'. Use one of: {', '.join(SCRIBE_MODES)}.")
         scribe_nodes = ScribeNodes()
+        self.scribe_workflow.add_node("trim_silence", scribe_nodes.trim_silence)
         self.scribe_workflow.add_node("transcribe_audio", scribe_nodes.transcribe_audio)
         self.scribe_workflow.add_node("structure_transcript", scribe_nodes.structure_transcript)
         self.scribe_workflow.add_node("generate_soap_note", scribe_nodes.generate_soap_note)
+        self.scribe_workflow.add_node("structure_and_generate_note", scribe_nodes.structure_and_generate_note)
         self.scribe_workflow.add_node("save_note", scribe_nodes.save_note)
-        self.scribe_workflow.set_entry_point("transcribe_audio")
-        self.scribe_workflow.add_edge("transcribe_audio", "structure_transcript")
+        self.scribe_workflow.set_entry_point("trim_silence")
+        self.scribe_workflow.add_edge("trim_silence", "transcribe_audio")
+        self.scribe_workflow.add_conditional_edges(
+            "transcribe_audio",
+            self._route_scribe_mode,
+            {"two_step": "structure_transcript", "single_pass": "structure_and_generate_note"}
+        )
+        self.scribe_workflow.add_edge("structure_and_generate_note", "save_note")
         self.scribe_workflow.add_edge("structure_transcript", "generate_soap_note")
         self.scribe_workflow.add_edge("generate_soap_note", "save_note")
         self.scribe_workflow.add_edge("save_note", END)
 
+    @staticmethod
+    def _route_scribe_mode(state) -> str:
+        return state.get("scribe_mode") or settings.SCRIBE_MODE
+
     def _build_ddx_graph(self):
         diagnosis_nodes = DiagnosisNodes()
         self.ddx_workflow.add_node("gather_patient_data", diagnosis_nodes.gather_patient_data)
         self.ddx_workflow.add_node("generate_ddx_report", diagnosis_nodes.generate_ddx_report)
         self.ddx_workflow.add_node("save_ddx_result", diagnosis_nodes.save_ddx_result)
-        self.ddx_workflow.set_entry_point("gather_patient_data")
-        self.ddx_workflow.add_edge("gather_patient_data", "generate_ddx_report")
-        self.ddx_workflow.add_edge("generate_ddx_report", "save_ddx_result")
+        # Batch runs gather the data up front and pass it in the initial state.
+        self.ddx_workflow.set_conditional_entry_point(
+            self._route_ddx_entry,
+            {"gather": "gather_patient_data", "generate": "generate_ddx_report", "reuse": END}
+        )
+        self.ddx_workflow.add_conditional_edges(
+            "gather_patient_data",
+            lambda state: "reuse" if state.get("cache_hit") else "generate",
+            {"reuse": END, "generate": "generate_ddx_report"}
+        )
+        # Batch runs write all results at once instead of saving one by one.
+        self.ddx_workflow.add_conditional_edges(
+            "generate_ddx_report",
+            lambda state: "defer" if state.get("defer_save") else "save",
+            {"defer": END, "save": "save_ddx_result"}
+        )
         self.ddx_workflow.add_edge("save_ddx_result", END)
 
+    @staticmethod
+    def _route_ddx_entry(state) -> str:
+        if state.get("cache_hit"):
+            return "reuse"
+        return "generate" if state.get("patient_data_context") else "gather"
 
-# Instantiate the graph builder to make runnables available for import
+
+# Instantiate the graph builder to make the graphs available for import
 agent_graphs = AgentGraphs()
-scribe_agent_runnable = agent_graphs.scribe_agent_runnable
-ddx_agent_runnable = agent_graphs.ddx_agent_runnable
+GRAPH_NAMES = ("scribe", "ddx")
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+async def run_graph(graph_name: str, consultation_id: int, initial_state: dict, run_id: Optional[str] = None) -> dict:
+    """Runs a graph to completion under a (new) run id, which is included in the returned state."""
+    run_id = run_id or new_run_id()
+    runnable = await agent_graphs.get_runnable(graph_name)
+    return await runnable.ainvoke(
+        {**initial_state, "consultation_id": consultation_id, "run_id": run_id},
+        graph_run_config(graph_name, consultation_id, run_id)
+    )
+
+
+# Scribe nodes that read the recording, which is deleted when a run ends.
+SCRIBE_AUDIO_NODES = {"trim_silence", "transcribe_audio"}
+
+
+def _check_scribe_audio(snapshot):
+    if SCRIBE_AUDIO_NODES & set(snapshot.next) and not os.path.exists(snapshot.values.get("audio_file_path") or ""):
+        raise RunNotResumable(
+            "The recording for this run has been deleted, so it cannot be transcribed again. "
+            "Upload the recording to start a new run."
+        )
+
+
+async def resume_graph(graph_name: str, consultation_id: int, run_id: str) -> dict:
+    """
+    Resumes a run from its last good checkpoint. Raises LookupError for unknown
+    runs and RunNotResumable for Scribe runs that would need the deleted recording.
+    """
+    runnable = await agent_graphs.get_runnable(graph_name)
+    check = _check_scribe_audio if graph_name == "scribe" else None
+    return await resume_run(runnable, graph_run_config(graph_name, consultation_id, run_id), check)
+
+
+async def get_graph_run_outputs(graph_name: str, consultation_id: int, run_id: str) -> list:
+    """Per-node outputs of a run, from its checkpoints. Raises LookupError for unknown runs."""
+    runnable = await agent_graphs.get_runnable(graph_name)
+    return await run_outputs(runnable, graph_run_config(graph_name, consultation_id, run_id))
+
+
+async def stream_ddx(consultation_id: int, force: bool = False) -> AsyncIterator[dict]:
+    """
+    Runs the DDx graph and streams its progress: `step` as each node starts,
+    `token` for each piece of the report as the model writes it, and a closing
+    `final` event with the result and run id. The graph's save node persists the
+    report. A reused DDx (`cache_hit`) arrives in the `final` event only.
+    """
+    final_state = {}
+    run_id = new_run_id()
+    runnable = await agent_graphs.get_runnable("ddx")
+    async for event in runnable.astream_events(
+            {"consultation_id": consultation_id, "run_id": run_id, "force": force},
+            graph_run_config("ddx", consultation_id, run_id),
+            version="v2"
+    ):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+        if kind == "on_chain_start" and event["name"] == node:
+            yield {"type": "step", "node": node}
+        elif kind == "on_chat_model_stream" and node == "generate_ddx_report":
+            text = event["data"]["chunk"].content
+            if text:
+                yield {"type": "token", "text": text}
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            final_state = event["data"].get("output") or {}
+
+    yield {
+        "type": "final",
+        "ddx_result": final_state.get("ddx_result"),
+        "error": final_state.get("error"),
+        "cache_hit": final_state.get("cache_hit", False),
+        "run_id": run_id,
+    }
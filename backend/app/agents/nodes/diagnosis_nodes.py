@@ -1,13 +1,116 @@
 # backend/app/agents/nodes/diagnosis_nodes.py
 
-from langchain_openai import ChatOpenAI
+import hashlib
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.services.consultation_service import ConsultationService
-from app.models.consultation import Consultation  # <--- This is the missing import
+from app.models.consultation import Consultation, MedicalReport  # <--- This is the missing import
+from app.agents.tools.medical_report_tools import report_summary_sections
+from app.services.context_builder import ContextBuilder, ContextSection
+from app.services.llm_gateway import llm_gateway
+from app.services.rollup_service import consultation_rollup, rollup_is_current, soap_note_hash
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=settings.OPENAI_API_KEY)
+ddx_context_builder = ContextBuilder(token_budget=settings.DDX_CONTEXT_TOKEN_BUDGET, model=llm_gateway.model_for("ddx"))
+
+# Bump when the DDx prompt or context layout changes, so stored results are regenerated.
+# A change of the DDx model regenerates them on its own (it is part of the fingerprint).
+DDX_VERSION = "2"
+
+
+def context_fingerprint(notes: Optional[str], soap_hash: Optional[str], report_summaries: Dict[int, str]) -> str:
+    """
+    Fingerprint of the DDx model and the data the DDx is generated from: the
+    notes, the SOAP note (by hash) and each summarized report's id and summary.
+    The rollup's own text is left out: it is LLM output that differs between
+    refreshes of the same data.
+    """
+    digest = hashlib.sha256(f"ddx-v{DDX_VERSION}\0{llm_gateway.model_for('ddx')}\0".encode("utf-8"))
+    summaries = [f"{report_id}:{summary}" for report_id, summary in sorted(report_summaries.items())]
+    for part in [notes, soap_hash, *summaries]:
+        digest.update((part or "").encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+def build_patient_context(consultation: Consultation, rollup: Optional[str],
+                          reports: List[MedicalReport], force: bool) -> dict:
+    """
+    Builds the DDx context from the consultation's notes plus either its rollup
+    or (without one) its SOAP note and report summaries. `reports` are the
+    consultation's reports either way, since the fingerprint covers their
+    summaries. Returns the DDx graph state update, with the stored DDx as a
+    cache hit if the fingerprint is unchanged and `force` is not set.
+    """
+    report_summaries = {report.id: report.summary for report in reports if report.summary is not None}
+    sections = [ContextSection(f"Patient Notes: {consultation.notes}", rank=(0,))]
+    if rollup:
+        sections.append(ContextSection(f"Consultation Summary (SOAP note and all uploaded reports):\n{rollup}", rank=(0,)))
+        # Fingerprint what the rollup was built from, which may trail the reports by a just-finished upload.
+        sources = json.loads(consultation.rollup_sources or "{}")
+        merged_ids = set(sources.get("report_ids", []))
+        report_summaries = {
+            report_id: summary for report_id, summary in report_summaries.items() if report_id in merged_ids
+        }
+        soap_hash = sources.get("soap_note")
+    else:
+        # The SOAP note outranks report summaries; newer reports outrank older ones.
+        sections.append(ContextSection(f"SOAP Note from Consultation Audio:\n{consultation.soap_note}", rank=(0,)))
+        sections += report_summary_sections(reports, rank=1, group="--- Uploaded Reports Summaries ---")
+        soap_hash = soap_note_hash(consultation.soap_note)
+    built = ddx_context_builder.build(sections)
+    context_stats = built.stats()
+    print(f"DDx context for consultation {consultation.id}: {context_stats}")
+
+    fingerprint = context_fingerprint(consultation.notes, soap_hash, report_summaries)
+    update = {
+        "patient_data_context": built.text,
+        "context_stats": context_stats,
+        "context_fingerprint": fingerprint,
+        "cache_hit": False,
+    }
+    if not force and consultation.ddx_result and consultation.ddx_fingerprint == fingerprint:
+        print(f"Consultation {consultation.id} is unchanged; reusing the stored DDx.")
+        update.update({"ddx_result": consultation.ddx_result, "cache_hit": True})
+    return update
+
+
+def gather_patient_data_bulk(consultation_ids: List[int], force: bool) -> Dict[int, dict]:
+    """
+    `gather_patient_data` for many consultations in two queries: the
+    consultations and their reports. Stale rollups are used from report
+    summaries this time and refreshed in the background, so the batch makes no
+    rollup LLM calls. The fingerprint covers the same source data either way,
+    so the refreshed rollup does not cause the DDx to be generated again.
+    """
+    db = SessionLocal()
+    try:
+        consultations = {
+            consultation.id: consultation
+            for consultation in db.query(Consultation).filter(Consultation.id.in_(consultation_ids)).all()
+        }
+        reports = defaultdict(list)
+        for report in db.query(MedicalReport).filter(MedicalReport.consultation_id.in_(consultation_ids)).all():
+            reports[report.consultation_id].append(report)
+
+        updates = {}
+        for consultation_id in consultation_ids:
+            consultation = consultations.get(consultation_id)
+            if consultation is None:
+                updates[consultation_id] = {"error": "Consultation not found."}
+                continue
+            summarized_ids = {report.id for report in reports[consultation_id] if report.summary is not None}
+            if rollup_is_current(consultation, summarized_ids):
+                rollup = consultation.rollup_summary
+            else:
+                rollup = None
+                consultation_rollup.schedule_refresh(consultation_id)
+            updates[consultation_id] = build_patient_context(consultation, rollup, reports[consultation_id], force)
+        return updates
+    finally:
+        db.close()
 
 
 class DiagnosisNodes:
@@ -16,25 +119,27 @@ class DiagnosisNodes:
     """
 
     def gather_patient_data(self, state):
-        """Gathers all available data for a given consultation."""
+        """
+        Gathers all available data for a given consultation. If the stored DDx
+        was generated from exactly this data (and `force` is not set), it is
+        returned as a cache hit and the graph skips generation.
+        """
         print("--- Node: Gathering Patient Data ---")
         consultation_id = state['consultation_id']
+        # The rollup is one precomputed summary of the SOAP note and all reports.
+        try:
+            rollup = consultation_rollup.get_rollup(consultation_id)
+        except Exception as e:
+            print(f"Could not get the rollup for consultation {consultation_id}; using report summaries. Error: {e}")
+            rollup = None
         db = SessionLocal()
         try:
             consultation_service = ConsultationService(db)
             consultation = consultation_service.get_consultation_by_id(consultation_id)
             if not consultation:
                 return {"error": "Consultation not found."}
-
             reports = consultation_service.get_reports_for_consultation(consultation_id)
-
-            context = f"Patient Notes: {consultation.notes}\n\n"
-            context += f"SOAP Note from Consultation Audio:\n{consultation.soap_note}\n\n"
-            context += "--- Uploaded Reports Summaries ---\n"
-            for report in reports:
-                context += f"Report: {report.file_path.split('/')[-1]}\nSummary: {report.summary}\n\n"
-
-            return {"patient_data_context": context}
+            return build_patient_context(consultation, rollup, reports, state.get('force', False))
         finally:
             db.close()
 
@@ -58,7 +163,7 @@ class DiagnosisNodes:
         {context}
         """
         prompt = ChatPromptTemplate.from_template(prompt_template)
-        chain = prompt | llm
+        chain = prompt | llm_gateway.chat("ddx", temperature=0)
 
         ddx_report = chain.invoke({"context": context})
         return {"ddx_result": ddx_report.content}
@@ -71,6 +176,7 @@ class DiagnosisNodes:
             consultation = db.query(Consultation).filter(Consultation.id == state['consultation_id']).first()
             if consultation:
                 consultation.ddx_result = state['ddx_result']
+                consultation.ddx_fingerprint = state.get('context_fingerprint')
                 db.commit()
                 print(f"Successfully saved DDx for consultation {state['consultation_id']}")
             else:
@@ -1,18 +1,19 @@
 # backend/app/agents/nodes/scribe_nodes.py
 
-from openai import OpenAI
+import asyncio
+import json
+import os
+from sqlalchemy import select
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal
 from app.models.consultation import Consultation
-from langchain_openai import ChatOpenAI
+from app.services.audio_preprocessing import prepare_audio
+from app.services.llm_gateway import llm_gateway
+from app.services.rollup_service import consultation_rollup
+from app.services.transcription_service import transcription_service
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.pydantic_v1 import BaseModel, Field
-from typing import List  # <--- This is the missing import
-
-# Initialize clients
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=settings.OPENAI_API_KEY)
-
+from typing import List, Optional  # <--- This is the missing import
 
 # Pydantic model for structured data extraction
 class TranscriptSummary(BaseModel):
@@ -23,26 +24,99 @@ class TranscriptSummary(BaseModel):
     follow_up_instructions: List[str] = Field(description="List of follow-up actions or appointments suggested.")
 
 
+class StructuredSoapNote(TranscriptSummary):
+    """The structured fields and the finished SOAP note, produced in a single call."""
+    soap_note: str = Field(description="The complete SOAP note, with clear headings for Subjective, Objective, Assessment, and Plan.")
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# Graph modes: two sequential LLM calls (structure, then write), or one call that does both.
+SCRIBE_MODES = ("two_step", "single_pass")
+
+
+async def update_transcript_summary(summary: Optional[dict], transcript_delta: str) -> dict:
+    """
+    Folds a new stretch of transcript into a running TranscriptSummary, so a
+    live consultation is structured as it happens rather than all at the end.
+    """
+    prompt = ChatPromptTemplate.from_messages([
+        ("system",
+         "You are an expert medical assistant maintaining structured notes during a live medical consultation. "
+         "You are given the notes so far and the next part of the transcript. The new part may repeat the last "
+         "few words of the previous one. Return the complete updated notes as a JSON object matching the specified "
+         "schema: keep every existing item, add new information, and do not duplicate items."),
+        ("human", "Notes so far:\n{summary}\n\nNext part of the transcript:\n\n{transcript}")
+    ])
+    chain = prompt | llm_gateway.chat("scribe_structure", temperature=0).with_structured_output(TranscriptSummary)
+    updated = await chain.ainvoke({
+        "summary": json.dumps(summary or {}, indent=2),
+        "transcript": transcript_delta
+    })
+    return updated.dict()
+
+
 class ScribeNodes:
     """
     Contains all the functions (nodes) for the Scribe LangGraph agent.
+    All nodes are async so a running scribe never blocks the event loop.
     """
 
-    def transcribe_audio(self, state):
-        print("--- Node: Transcribing Audio ---")
+    async def trim_silence(self, state):
+        print("--- Node: Trimming Silence ---")
+        if not settings.SCRIBE_VAD_ENABLED:
+            return {}
         try:
-            audio_file = open(state['audio_file_path'], "rb")
-            transcription = openai_client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file
+            prepared = await prepare_audio(
+                state['audio_file_path'],
+                margin_db=settings.SCRIBE_VAD_MARGIN_DB,
+                min_silence_seconds=settings.SCRIBE_VAD_MIN_SILENCE_SECONDS
             )
-            print(f"Transcription successful: {transcription.text[:100]}...")
-            return {"transcription": transcription.text}
+        except Exception as e:
+            # Trimming is an optimization; transcribe the original if it fails (e.g. no ffmpeg).
+            print(f"Skipping silence trimming: {e}")
+            return {}
+        if prepared.trimmed:
+            print(f"Removed {prepared.removed_seconds:.1f}s of {prepared.original_seconds:.1f}s as silence")
+        else:
+            print("Little or no silence found; transcribing the whole recording.")
+        audio_stats = {
+            "original_seconds": round(prepared.original_seconds, 1),
+            "speech_seconds": round(prepared.speech_seconds, 1),
+            "removed_seconds": round(prepared.removed_seconds, 1),
+        }
+        return {"speech_pcm_path": prepared.pcm_path, "speech_trimmed": prepared.trimmed, "audio_stats": audio_stats}
+
+    async def transcribe_audio(self, state):
+        print("--- Node: Transcribing Audio ---")
+        speech_pcm_path = state.get('speech_pcm_path')
+        if speech_pcm_path and not os.path.exists(speech_pcm_path):
+            # A resumed run whose decoded speech was already cleaned up: start again from the recording.
+            speech_pcm_path = None
+        try:
+            if not speech_pcm_path:
+                transcription = await transcription_service.transcribe(state['audio_file_path'])
+            elif state.get('speech_trimmed'):
+                # The trimmed speech only exists as PCM; send it without another decode or encode.
+                pcm = await asyncio.to_thread(_read_file, speech_pcm_path)
+                transcription = await transcription_service.transcribe_pcm(pcm)
+            else:
+                # Untrimmed: reuse the decode, so a short recording can still be sent in its compressed form.
+                pcm = await asyncio.to_thread(_read_file, speech_pcm_path)
+                transcription = await transcription_service.transcribe(state['audio_file_path'], pcm=pcm)
+            print(f"Transcription successful: {transcription[:100]}...")
+            return {"transcription": transcription}
         except Exception as e:
             print(f"Error in transcription: {e}")
             return {"error": "Failed to transcribe audio."}
+        finally:
+            if speech_pcm_path and os.path.exists(speech_pcm_path):
+                await asyncio.to_thread(os.remove, speech_pcm_path)
 
-    def structure_transcript(self, state):
+    async def structure_transcript(self, state):
         print("--- Node: Structuring Transcript ---")
         try:
             prompt = ChatPromptTemplate.from_messages([
@@ -50,16 +124,39 @@ class ScribeNodes:
                  "You are an expert medical assistant. Extract key information from the following medical consultation transcript. Respond with a JSON object matching the specified schema."),
                 ("human", "Transcript:\n\n{transcript}")
             ])
-            structured_llm = llm.with_structured_output(TranscriptSummary)
+            structured_llm = llm_gateway.chat("scribe_structure", temperature=0).with_structured_output(TranscriptSummary)
             chain = prompt | structured_llm
-            summary = chain.invoke({"transcript": state['transcription']})
+            summary = await chain.ainvoke({"transcript": state['transcription']})
             print(f"Structuring successful: {summary}")
             return {"structured_summary": summary.dict()}
         except Exception as e:
             print(f"Error structuring transcript: {e}")
             return {"error": "Failed to structure transcript."}
 
-    def generate_soap_note(self, state):
+    async def structure_and_generate_note(self, state):
+        print("--- Node: Structuring Transcript and Generating SOAP Note ---")
+        try:
+            prompt = ChatPromptTemplate.from_messages([
+                ("system",
+                 "You are an expert medical assistant and clinical note writer. From the following medical "
+                 "consultation transcript, extract the key information into the structured fields and write a "
+                 "SOAP note with clear headings for Subjective, Objective, Assessment, and Plan. "
+                 "Base both ONLY on the transcript; do not make up information. If a SOAP section has no "
+                 "information, explicitly state that (e.g., \"No specific symptoms were mentioned by the patient.\"). "
+                 "Respond with a JSON object matching the specified schema."),
+                ("human", "Transcript:\n\n{transcript}")
+            ])
+            chain = prompt | llm_gateway.chat("scribe_note", temperature=0).with_structured_output(StructuredSoapNote)
+            result = await chain.ainvoke({"transcript": state['transcription']})
+            print("Structured SOAP note generated successfully.")
+            structured_summary = result.dict()
+            final_note = structured_summary.pop("soap_note")
+            return {"structured_summary": structured_summary, "final_note": final_note}
+        except Exception as e:
+            print(f"Error generating structured SOAP note: {e}")
+            return {"error": "Failed to generate SOAP note."}
+
+    async def generate_soap_note(self, state):
         print("--- Node: Generating SOAP Note ---")
         try:
             summary = state['structured_summary']
@@ -78,9 +175,9 @@ class ScribeNodes:
             Generate the SOAP note now with clear headings for Subjective, Objective, Assessment, and Plan.
             """
             prompt = ChatPromptTemplate.from_template(prompt_template)
-            chain = prompt | llm
+            chain = prompt | llm_gateway.chat("scribe_note", temperature=0)
 
-            note = chain.invoke({
+            note = await chain.ainvoke({
                 "symptoms": ", ".join(summary.get('patient_symptoms', [])),
                 "observations": ", ".join(summary.get('doctor_observations', [])),
                 "medications": ", ".join(summary.get('prescribed_medications', [])),
@@ -92,22 +189,22 @@ class ScribeNodes:
             print(f"Error generating SOAP note: {e}")
             return {"error": "Failed to generate SOAP note."}
 
-    def save_note(self, state):
+    async def save_note(self, state):
         print("--- Node: Saving Note to DB ---")
-        db = SessionLocal()
-        try:
-            consultation = db.query(Consultation).filter(Consultation.id == state['consultation_id']).first()
-            if consultation:
-                consultation.soap_note = state['final_note']
-                db.commit()
-                print(f"Successfully saved note for consultation {state['consultation_id']}")
-            else:
-                print(f"Error: Consultation {state['consultation_id']} not found in DB.")
-                return {"error": "Consultation not found."}
-        except Exception as e:
-            print(f"Error saving note to DB: {e}")
-            db.rollback()
-            return {"error": "Failed to save note to database."}
-        finally:
-            db.close()
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(select(Consultation).where(Consultation.id == state['consultation_id']))
+                consultation = result.scalars().first()
+                if consultation:
+                    consultation.soap_note = state['final_note']
+                    await db.commit()
+                    print(f"Successfully saved note for consultation {state['consultation_id']}")
+                    consultation_rollup.schedule_refresh(state['consultation_id'])
+                else:
+                    print(f"Error: Consultation {state['consultation_id']} not found in DB.")
+                    return {"error": "Consultation not found."}
+            except Exception as e:
+                print(f"Error saving note to DB: {e}")
+                await db.rollback()
+                return {"error": "Failed to save note to database."}
         return {}
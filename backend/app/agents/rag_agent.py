@@ -1,14 +1,19 @@
 # backend/app/agents/rag_agent.py
 
-from langchain_openai import ChatOpenAI
+import threading
+import time
+from collections import OrderedDict
+from langchain_core.language_models import BaseChatModel
 from langchain_community.vectorstores import Qdrant
-from langchain_openai import OpenAIEmbeddings
 from langchain.prompts import ChatPromptTemplate
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain.chains import create_retrieval_chain
 
 from app.core.config import settings
 from app.db.vector_db import get_qdrant_client
+from app.services.embedding_cache import with_embedding_cache
+from app.services.llm_gateway import llm_gateway
+from app.services.vector_index_service import add_index_listener, collection_name_for
 
 
 class RAGAgent:
@@ -17,10 +22,11 @@ class RAGAgent:
     based on documents stored in a Qdrant collection.
     """
 
-    def __init__(self, consultation_id: int):
-        self.llm = ChatOpenAI(model="gpt-4o", api_key=settings.OPENAI_API_KEY)
-        self.embeddings = OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY)
-        self.collection_name = f"consultation_{consultation_id}"
+    def __init__(self, consultation_id: int, llm: BaseChatModel = None, embeddings=None):
+        # Pooled agents pass shared clients so they reuse HTTP connections.
+        self.llm = llm or llm_gateway.chat("rag")
+        self.embeddings = embeddings or with_embedding_cache(llm_gateway.embeddings())
+        self.collection_name = collection_name_for(consultation_id)
 
         # Initialize the vector store retriever
         vector_store = Qdrant(
@@ -58,3 +64,67 @@ class RAGAgent:
         response = await self.rag_chain.ainvoke({"input": question})
         return response.get("answer", "I could not find an answer.")
 
+
+
+class RAGAgentPool:
+    """
+    Keeps warm RAG agents per consultation. Least recently used agents are
+    evicted past `max_size`, agents older than `ttl_seconds` are rebuilt, and a
+    consultation's agent is dropped whenever its vector collection changes.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._agents = OrderedDict()  # consultation_id -> (created_at, RAGAgent)
+        self._lock = threading.Lock()
+        self._llm = None
+        self._embeddings = None
+
+    def get(self, consultation_id: int) -> RAGAgent:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._agents.get(consultation_id)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._agents.move_to_end(consultation_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            if self._llm is None:
+                self._llm = llm_gateway.chat("rag")
+                self._embeddings = with_embedding_cache(llm_gateway.embeddings())
+            agent = RAGAgent(consultation_id, llm=self._llm, embeddings=self._embeddings)
+            self._agents[consultation_id] = (now, agent)
+            self._agents.move_to_end(consultation_id)
+            while len(self._agents) > self.max_size:
+                self._agents.popitem(last=False)
+            return agent
+
+    def invalidate(self, consultation_id: int):
+        with self._lock:
+            self._agents.pop(consultation_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "size": len(self._agents),
+                "max_size": self.max_size,
+            }
+
+
+rag_agent_pool = RAGAgentPool(
+    max_size=settings.RAG_POOL_MAX_SIZE,
+    ttl_seconds=settings.RAG_POOL_TTL_SECONDS,
+)
+add_index_listener(rag_agent_pool.invalidate)
+
+
+def get_rag_agent(consultation_id: int) -> RAGAgent:
+    """Returns a warm RAG agent for the consultation from the process-wide pool."""
+    return rag_agent_pool.get(consultation_id)
@@ -1,36 +1,69 @@
 # backend/app/agents/tools/medical_report_tools.py
 
+import asyncio
+from typing import List
 from langchain.tools import tool
-from app.db.session import SessionLocal
-from app.services.consultation_service import ConsultationService
-from app.agents.rag_agent import RAGAgent
+from app.db.session import AsyncSessionLocal
+from app.models.consultation import MedicalReport
+from app.services.consultation_service import AsyncConsultationService
+from app.agents.rag_agent import get_rag_agent
+from app.core.config import settings
+from app.services.context_builder import ContextBuilder, ContextSection
+from app.services.llm_gateway import llm_gateway
+from app.services.rollup_service import consultation_rollup
+
+summaries_context_builder = ContextBuilder(
+    token_budget=settings.SUMMARIES_CONTEXT_TOKEN_BUDGET, model=llm_gateway.model_for("agent")
+)
+
+
+def report_summary_sections(reports: List[MedicalReport], rank: int = 0, group: str = None) -> List[ContextSection]:
+    """Context sections for report summaries; newer reports are kept first when the budget is tight."""
+    sections = []
+    for report in reports:
+        file_name = report.file_path.split('/')[-1]
+        summary = report.summary or "No summary available."
+        sections.append(ContextSection(f"Report: {file_name}\nSummary: {summary}", rank=(rank, -report.id), group=group))
+    return sections
+
+
+def format_report_summaries(reports: List[MedicalReport]) -> str:
+    """Formats report summaries as the text returned to agents, within the summaries token budget."""
+    if not reports:
+        return "No reports have been uploaded for this consultation yet."
+
+    built = summaries_context_builder.build(report_summary_sections(reports))
+    if built.dropped_tokens:
+        print(f"Report summaries trimmed to the context budget: {built.stats()}")
+    return built.text
+
+
+async def fetch_report_summaries(consultation_id: int) -> str:
+    """
+    Returns the consultation's rollup summary (SOAP note and all reports). Falls
+    back to the individual report summaries if no rollup can be produced.
+    """
+    try:
+        rollup = await asyncio.to_thread(consultation_rollup.get_rollup, consultation_id)
+        if rollup:
+            return rollup
+    except Exception as e:
+        print(f"Could not get the rollup for consultation {consultation_id}; using report summaries. Error: {e}")
+    async with AsyncSessionLocal() as db:
+        reports = await AsyncConsultationService(db).get_reports_for_consultation(consultation_id)
+    return format_report_summaries(reports)
 
 
 @tool
-def get_report_summaries(consultation_id: int) -> str:
+async def get_report_summaries(consultation_id: int) -> str:
     """
-    Use this tool to get a list of AI-generated summaries for ALL reports
-    (both text and images like X-rays or MRIs) associated with a specific consultation.
+    Use this tool to get a consolidated AI-generated summary of ALL reports
+    (both text and images like X-rays or MRIs) and the SOAP note of a specific consultation.
     This is the best tool for broad questions about overall findings or for information
     from image-based reports.
     """
     print(f"--- Tool Used: get_report_summaries for consultation {consultation_id} ---")
-    db = SessionLocal()
-    try:
-        consultation_service = ConsultationService(db)
-        reports = consultation_service.get_reports_for_consultation(consultation_id)
-        if not reports:
-            return "No reports have been uploaded for this consultation yet."
-
-        formatted_summaries = []
-        for report in reports:
-            file_name = report.file_path.split('/')[-1]
-            summary = report.summary or "No summary available."
-            formatted_summaries.append(f"Report: {file_name}\nSummary: {summary}")
-
-        return "\n\n".join(formatted_summaries)
-    finally:
-        db.close()
+    return await fetch_report_summaries(consultation_id)
 
 
 @tool
@@ -42,7 +75,7 @@ async def query_detailed_text_reports(consultation_id: int, question: str) -> st
     """
     print(f"--- Tool Used: query_detailed_text_reports for consultation {consultation_id} ---")
     try:
-        rag_agent = RAGAgent(consultation_id=consultation_id)
+        rag_agent = get_rag_agent(consultation_id)
         # Use await for the async function
         answer = await rag_agent.answer_question(question)
         return answer
@@ -1,31 +1,67 @@
 # backend/app/apis/v1/router_ai_features.py
 
+import asyncio
+import json
+import os
 import shutil
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from app.agents.consultation_agent import ConsultationAgent
-from app.schemas.ai_schema import QuestionRequest, AnswerResponse
-from app.services.consultation_service import ConsultationService
-from app.db.session import get_db
+import tempfile
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status, File, UploadFile, WebSocket
+from fastapi.responses import StreamingResponse
+from app.agents.consultation_agent import get_consultation_agent
+from app.schemas.ai_schema import QuestionRequest, AnswerResponse, DdxBatchRequest, DdxBatchResponse
+from app.services.consultation_service import AsyncConsultationService
+from app.core.security import decode_access_token
+from app.db.session import get_db, get_async_db, AsyncSessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.apis.v1.router_users import get_current_user
 from app.models.user import User
-from app.agents.graph_builder import scribe_agent_runnable, ddx_agent_runnable
+from app.agents.checkpointing import RunNotResumable
+from app.agents.graph_builder import GRAPH_NAMES, get_graph_run_outputs, resume_graph, run_graph, stream_ddx
+from app.agents.nodes.scribe_nodes import SCRIBE_MODES
+from app.models.job import ScribeJob
+from app.schemas.job_schema import ScribeJobOut
+from app.services.scribe_service import scribe_service
+from app.services.live_scribe_service import create_live_scribe_session
+from app.services.transcription_service import ffmpeg_available
+from app.services.ddx_batch_service import doctor_consultation_ids, run_ddx_batch, scheduled_consultation_ids
+from app.core.config import settings
 
 router = APIRouter()
 
 
+async def _sse(events: AsyncIterator[dict]) -> AsyncIterator[str]:
+    """Formats agent events as Server-Sent Events; errors are reported as a final event."""
+    try:
+        async for event in events:
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'type': 'error', 'detail': str(e)})}\n\n"
+
+
+def _sse_response(events: AsyncIterator[dict]) -> StreamingResponse:
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        # Stop proxies from buffering, which would defeat the point of streaming.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/consultations/{consultation_id}/ask", response_model=AnswerResponse)
 async def ask_question_about_report(
         consultation_id: int,
         request: QuestionRequest,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """
     Ask a question about the documents uploaded for a specific consultation.
     This now uses an advanced agent that can query both summaries and details.
     """
-    consultation_service = ConsultationService(db)
-    consultation = consultation_service.get_consultation_by_id(consultation_id)
+    consultation_service = AsyncConsultationService(db)
+    consultation = await consultation_service.get_consultation_by_id(consultation_id)
     if not consultation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -33,8 +69,10 @@ async def ask_question_about_report(
         )
 
     try:
-        consultation_agent = ConsultationAgent(consultation_id=consultation_id)
-        answer = await consultation_agent.answer_question(question=request.question)
+        answer = await get_consultation_agent().answer_question(
+            consultation_id=consultation_id,
+            question=request.question
+        )
         return AnswerResponse(answer=answer)
     except Exception as e:
         raise HTTPException(
@@ -43,51 +81,332 @@ async def ask_question_about_report(
         )
 
 
+@router.post("/consultations/{consultation_id}/ask/stream")
+async def stream_answer_about_report(
+        consultation_id: int,
+        request: QuestionRequest,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Streaming variant of `/ask`: sends agent steps and final-answer tokens as
+    Server-Sent Events while the answer is being generated.
+    """
+    consultation_service = AsyncConsultationService(db)
+    consultation = await consultation_service.get_consultation_by_id(consultation_id)
+    if not consultation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Consultation with id {consultation_id} not found."
+        )
+
+    return _sse_response(
+        get_consultation_agent().stream_answer(consultation_id=consultation_id, question=request.question)
+    )
+
+
+def _save_audio_upload(file: UploadFile) -> str:
+    """Copies an uploaded recording to a unique temp file, so concurrent uploads never collide."""
+    _, extension = os.path.splitext(file.filename or "")
+    fd, temp_file_path = tempfile.mkstemp(prefix="scribe_", suffix=extension or ".webm")
+    with os.fdopen(fd, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    return temp_file_path
+
+
 @router.post("/consultations/{consultation_id}/create-note-from-audio")
 async def create_soap_note_from_audio(
         consultation_id: int,
+        response: Response,
         file: UploadFile = File(...),
+        background: bool = False,
+        mode: Optional[str] = None,
         current_user: User = Depends(get_current_user)
 ):
     """
     Accepts an audio file, processes it through the Scribe agent,
     and returns the generated SOAP note.
+    With `background=true` (for long recordings) it returns 202 with a job
+    right away; poll `/scribe-jobs/{job_id}` for the note.
+    `mode` picks the graph variant ("two_step" or "single_pass"); it defaults to SCRIBE_MODE.
     """
-    temp_file_path = f"temp_{file.filename}"
-    with open(temp_file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    initial_state = {
-        "consultation_id": consultation_id,
-        "audio_file_path": temp_file_path,
-    }
-    final_state = scribe_agent_runnable.invoke(initial_state)
+    if mode is not None and mode not in SCRIBE_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown scribe mode '{mode}'. Use one of: {', '.join(SCRIBE_MODES)}."
+        )
+    temp_file_path = await asyncio.to_thread(_save_audio_upload, file)
+    if background:
+        job = await scribe_service.submit(consultation_id, temp_file_path, mode)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return ScribeJobOut.from_orm(job)
+
+    final_state = await scribe_service.run(consultation_id, temp_file_path, mode)
     if final_state.get("error"):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"AI Scribe failed: {final_state['error']}"
+            detail=f"AI Scribe failed: {final_state['error']} (run_id: {final_state['run_id']})"
         )
-    return {"soap_note": final_state.get("final_note", "No note was generated.")}
+    return {
+        "soap_note": final_state.get("final_note", "No note was generated."),
+        "audio_stats": final_state.get("audio_stats"),
+        "run_id": final_state["run_id"],
+    }
+
+
+@router.get("/scribe-jobs/{job_id}", response_model=ScribeJobOut)
+def get_scribe_job(
+        job_id: int,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status of a background Scribe job, including the SOAP note once it is done.
+    """
+    job = db.query(ScribeJob).filter(ScribeJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Scribe job with id {job_id} not found."
+        )
+    if current_user.id not in (job.consultation.doctor_id, job.consultation.patient_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view Scribe jobs of your own consultations."
+        )
+    return job
+
+
+@router.websocket("/consultations/{consultation_id}/scribe/live")
+async def live_scribe(websocket: WebSocket, consultation_id: int, token: str):
+    """
+    Live Scribe: the client streams binary audio chunks while recording (browsers
+    can't set headers on WebSockets, so the access token is a query parameter).
+    The server sends `update` events with each transcribed stretch and the
+    running summary. Sending the text message `stop` ends the recording; the
+    server then sends a `note` event with the saved SOAP note (or `error`).
+    """
+    try:
+        token_data = decode_access_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.email == token_data.email))
+        user = result.scalars().first()
+        consultation = await AsyncConsultationService(db).get_consultation_by_id(consultation_id)
+    # Only the consultation's doctor may record it.
+    if not user or user.role != 'doctor' or not consultation or consultation.doctor_id != user.id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not ffmpeg_available():
+        # Refuse up front so the client uploads the recording when it stops instead.
+        await websocket.close(
+            code=status.WS_1011_INTERNAL_ERROR, reason="Live scribe is unavailable: ffmpeg is not installed."
+        )
+        return
+
+    await websocket.accept()
+    session = create_live_scribe_session(consultation_id)
+    connected = True
+
+    async def send(event: dict):
+        if connected:
+            await websocket.send_json(event)
+
+    updater = asyncio.create_task(session.run_periodic_updates(send))
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes"):
+                await session.add_audio(message["bytes"])
+            elif message.get("text") == "stop":
+                break
+    finally:
+        # Let an update that is already running finish, then write the note
+        # even if the client went away: the recording is complete either way.
+        session.stop()
+        await updater
+        try:
+            final_state = await session.finish()
+        except Exception as e:
+            final_state = {"error": str(e)}
+
+    if not connected:
+        return
+    if final_state.get("error"):
+        await websocket.send_json({"type": "error", "detail": f"AI Scribe failed: {final_state['error']}"})
+    else:
+        await websocket.send_json({"type": "note", "soap_note": final_state.get("final_note")})
+    await websocket.close()
 
 
 @router.post("/consultations/{consultation_id}/generate-ddx")
 async def generate_differential_diagnosis(
         consultation_id: int,
+        force: bool = False,
         current_user: User = Depends(get_current_user)
 ):
     """
     Triggers the Differential Diagnosis agent for a given consultation.
+    If nothing the DDx is based on has changed since it was last generated, the
+    stored result is returned (`cache_hit: true`) unless `force=true`.
     """
     if current_user.role != 'doctor':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only doctors can generate a DDx.")
 
-    initial_state = {"consultation_id": consultation_id}
+    final_state = await run_graph("ddx", consultation_id, {"force": force})
+
+    if final_state.get("error"):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"DDx generation failed: {final_state['error']} (run_id: {final_state['run_id']})"
+        )
+
+    return {
+        "ddx_result": final_state.get("ddx_result", "No DDx report was generated."),
+        "cache_hit": final_state.get("cache_hit", False),
+        "run_id": final_state["run_id"],
+    }
 
-    final_state = await ddx_agent_runnable.ainvoke(initial_state)
+
+@router.post("/consultations/{consultation_id}/generate-ddx/stream")
+async def stream_differential_diagnosis(
+        consultation_id: int,
+        force: bool = False,
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Streaming variant of `/generate-ddx`: sends graph steps and report tokens as
+    Server-Sent Events. The complete report is still saved to the consultation.
+    """
+    if current_user.role != 'doctor':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only doctors can generate a DDx.")
+
+    return _sse_response(stream_ddx(consultation_id, force))
+
+
+@router.post("/ddx/batch", response_model=DdxBatchResponse)
+async def generate_ddx_batch(
+        request: DdxBatchRequest,
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Generates the DDx for a list of the requesting doctor's consultations, or
+    for their schedule between two dates (by default today), e.g. to prepare
+    the day ahead. Listed consultations of other doctors are skipped. Unchanged
+    consultations reuse their stored DDx unless `force` is set. Reports
+    per-consultation status and throughput.
+    """
+    if current_user.role != 'doctor':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only doctors can generate a DDx.")
+    if request.doctor_id is not None and request.doctor_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only generate a DDx for your own consultations."
+        )
+
+    if request.consultation_ids:
+        consultation_ids = await asyncio.to_thread(
+            doctor_consultation_ids, current_user.id, request.consultation_ids
+        )
+    else:
+        consultation_ids = await asyncio.to_thread(
+            scheduled_consultation_ids, current_user.id, request.date_from, request.date_to
+        )
+    if len(consultation_ids) > settings.DDX_BATCH_MAX_CONSULTATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can include at most {settings.DDX_BATCH_MAX_CONSULTATIONS} consultations "
+                   f"({len(consultation_ids)} requested)."
+        )
+
+    return await run_ddx_batch(consultation_ids, force=request.force)
+
+
+# What each graph produces, as returned to the client.
+GRAPH_RESULT_KEYS = {"scribe": ("final_note", "soap_note"), "ddx": ("ddx_result", "ddx_result")}
+
+
+def _check_graph_name(graph_name: str):
+    if graph_name not in GRAPH_NAMES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown graph '{graph_name}'. Use one of: {', '.join(GRAPH_NAMES)}."
+        )
+
+
+async def _check_graph_run_access(consultation_id: int, current_user: User, db: AsyncSession):
+    """Graph runs hold transcripts and patient context, so only the consultation's doctor may see or resume them."""
+    if current_user.role != 'doctor':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only doctors can access graph runs.")
+    consultation = await AsyncConsultationService(db).get_consultation_by_id(consultation_id)
+    if not consultation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Consultation with id {consultation_id} not found."
+        )
+    if consultation.doctor_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only access graph runs of your own consultations."
+        )
+
+
+@router.post("/consultations/{consultation_id}/graph-runs/{graph_name}/{run_id}/resume")
+async def resume_graph_run(
+        consultation_id: int,
+        graph_name: str,
+        run_id: str,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Retries a failed Scribe or DDx run from its last completed node, so steps
+    that already succeeded (like transcription) are not repeated. A Scribe run
+    that failed before its transcript was made cannot be resumed (409), because
+    the recording is deleted when the run ends.
+    """
+    _check_graph_name(graph_name)
+    await _check_graph_run_access(consultation_id, current_user, db)
+
+    try:
+        if graph_name == "scribe":
+            final_state = await scribe_service.resume(consultation_id, run_id)
+        else:
+            final_state = await resume_graph(graph_name, consultation_id, run_id)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except RunNotResumable as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
     if final_state.get("error"):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"DDx generation failed: {final_state['error']}"
+            detail=f"Resumed {graph_name} run failed: {final_state['error']} (run_id: {run_id})"
         )
+    state_key, result_key = GRAPH_RESULT_KEYS[graph_name]
+    return {result_key: final_state.get(state_key), "run_id": run_id}
 
-    return {"ddx_result": final_state.get("ddx_result", "No DDx report was generated.")}
+
+@router.get("/consultations/{consultation_id}/graph-runs/{graph_name}/{run_id}")
+async def get_graph_run(
+        consultation_id: int,
+        graph_name: str,
+        run_id: str,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Debugging view of a Scribe or DDx run: what each completed node wrote to the
+    graph state, in order, from the run's checkpoints.
+    """
+    _check_graph_name(graph_name)
+    await _check_graph_run_access(consultation_id, current_user, db)
+    try:
+        steps = await get_graph_run_outputs(graph_name, consultation_id, run_id)
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return {"graph": graph_name, "consultation_id": consultation_id, "run_id": run_id, "steps": steps}
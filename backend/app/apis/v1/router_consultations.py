@@ -4,9 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
 from sqlalchemy.orm import Session
 from typing import List
 
+from app.core.config import settings
 from app.db.session import get_db
 # --- Updated Schema import ---
 from app.schemas.consultation_schema import ConsultationCreate, ConsultationOut, MedicalReportOut
+from app.schemas.job_schema import IngestionJobOut, BatchUploadOut
 from app.services.consultation_service import ConsultationService
 from app.apis.v1.router_users import get_current_user
 from app.models.user import User
@@ -48,13 +50,21 @@ def get_consultation_reports(
     return reports
 
 
-@router.post("/consultations/{consultation_id}/upload-report", response_model=MedicalReportOut)
+@router.post(
+    "/consultations/{consultation_id}/upload-report",
+    response_model=IngestionJobOut,
+    status_code=status.HTTP_202_ACCEPTED
+)
 def upload_medical_report(
     consultation_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Saves the report and queues its AI processing.
+    Poll `/jobs/{job_id}` for the processing status and the finished summary.
+    """
     consultation_service = ConsultationService(db)
     consultation = consultation_service.get_consultation_by_id(consultation_id)
     if not consultation:
@@ -63,8 +73,68 @@ def upload_medical_report(
             detail=f"Consultation with id {consultation_id} not found."
         )
 
-    report = consultation_service.save_report_file(
+    job = consultation_service.save_report_file(
         consultation_id=consultation_id,
         file=file
     )
-    return report
+    return job
+
+
+@router.post(
+    "/consultations/{consultation_id}/upload-reports",
+    response_model=BatchUploadOut,
+    status_code=status.HTTP_202_ACCEPTED
+)
+def upload_medical_reports(
+    consultation_id: int,
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Saves several reports at once and processes them together in the background.
+    Returns one result per file; accepted files carry a job to poll at `/jobs/{job_id}`.
+    """
+    if len(files) > settings.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BATCH_UPLOAD_MAX_FILES} files can be uploaded at once."
+        )
+    consultation_service = ConsultationService(db)
+    consultation = consultation_service.get_consultation_by_id(consultation_id)
+    if not consultation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Consultation with id {consultation_id} not found."
+        )
+
+    results = consultation_service.save_report_files(
+        consultation_id=consultation_id,
+        files=files
+    )
+    return {"results": results}
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobOut)
+def get_ingestion_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status of a report processing job, including the summary once it is done.
+    """
+    consultation_service = ConsultationService(db)
+    job = consultation_service.get_job_by_id(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with id {job_id} not found."
+        )
+    consultation = consultation_service.get_consultation_by_id(job.consultation_id)
+    if not consultation or current_user.id not in (consultation.doctor_id, consultation.patient_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view jobs of your own consultations."
+        )
+    return job
@@ -0,0 +1,26 @@
+# backend/app/apis/v1/router_metrics.py
+
+from fastapi import APIRouter, Depends
+from app.agents.rag_agent import rag_agent_pool
+from app.apis.v1.router_users import get_current_user
+from app.models.user import User
+from app.services.answer_cache import semantic_answer_cache
+from app.services.embedding_cache import embedding_cache
+from app.services.llm_gateway import llm_gateway
+from app.services.summary_cache import summary_cache
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def get_metrics(current_user: User = Depends(get_current_user)):
+    """
+    Cache and performance counters for this API process.
+    """
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "summary_cache": summary_cache.stats(),
+        "rag_agent_pool": rag_agent_pool.stats(),
+        "answer_cache": semantic_answer_cache.stats(),
+        "llm_gateway": llm_gateway.stats(),
+    }
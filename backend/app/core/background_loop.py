@@ -0,0 +1,25 @@
+# backend/app/core/background_loop.py
+
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="background-loop", daemon=True).start()
+        return _loop
+
+
+def run_sync(coro):
+    """
+    Runs a coroutine from synchronous code (e.g. ingestion worker threads) on a
+    single long-lived event loop. Async HTTP clients are bound to the loop they
+    were first used on, so reusing one loop is safer than calling asyncio.run().
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
@@ -20,6 +20,100 @@ class Settings:
     QDRANT_HOST: str = os.getenv("QDRANT_HOST", "localhost")
     QDRANT_PORT: int = int(os.getenv("QDRANT_PORT", 6333))
 
+    # --- LLM gateway (shared OpenAI clients) ---
+    LLM_DEFAULT_MODEL: str = os.getenv("LLM_DEFAULT_MODEL", "gpt-4o")
+    # Per-stage model overrides, e.g. "summary_map=gpt-4o-mini,scribe_structure=gpt-4o-mini".
+    # Stages: scribe_structure, scribe_note, ddx, summary_map, summary_reduce, image_summary, rollup, rag, agent.
+    LLM_STAGE_MODELS: str = os.getenv("LLM_STAGE_MODELS", "")
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+    WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "whisper-1")
+    # Requests in flight across all models, and per model (overridable per model, e.g. "gpt-4o=8").
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", 32))
+    LLM_MODEL_MAX_CONCURRENCY: int = int(os.getenv("LLM_MODEL_MAX_CONCURRENCY", 16))
+    LLM_MODEL_CONCURRENCY: str = os.getenv("LLM_MODEL_CONCURRENCY", "")
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", 120))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", 3))
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", 64))
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 32))
+
+    # --- Offline backends (benchmarks and load tests without OpenAI or a Qdrant server) ---
+    # "openai", or "fake" for deterministic stand-ins with modelled latency and token counts.
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "openai")
+    # "qdrant" (the server at QDRANT_HOST), or "memory" for an in-process store that is lost on restart.
+    VECTOR_DB_BACKEND: str = os.getenv("VECTOR_DB_BACKEND", "qdrant")
+    FAKE_LLM_LATENCY_SECONDS: float = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", 0.5))
+    FAKE_LLM_SECONDS_PER_INPUT_TOKEN: float = float(os.getenv("FAKE_LLM_SECONDS_PER_INPUT_TOKEN", 0.00002))
+    FAKE_LLM_SECONDS_PER_OUTPUT_TOKEN: float = float(os.getenv("FAKE_LLM_SECONDS_PER_OUTPUT_TOKEN", 0.01))
+    FAKE_LLM_OUTPUT_TOKENS: int = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", 200))
+    FAKE_EMBEDDING_LATENCY_SECONDS: float = float(os.getenv("FAKE_EMBEDDING_LATENCY_SECONDS", 0.1))
+    FAKE_EMBEDDING_SECONDS_PER_TOKEN: float = float(os.getenv("FAKE_EMBEDDING_SECONDS_PER_TOKEN", 0.000005))
+    FAKE_EMBEDDING_DIMENSIONS: int = int(os.getenv("FAKE_EMBEDDING_DIMENSIONS", 1536))
+    FAKE_WHISPER_LATENCY_SECONDS: float = float(os.getenv("FAKE_WHISPER_LATENCY_SECONDS", 1.0))
+    FAKE_WHISPER_SECONDS_PER_AUDIO_SECOND: float = float(os.getenv("FAKE_WHISPER_SECONDS_PER_AUDIO_SECOND", 0.05))
+
+    # --- Background report ingestion ---
+    INGESTION_MAX_WORKERS: int = int(os.getenv("INGESTION_MAX_WORKERS", 4))
+    BATCH_UPLOAD_MAX_FILES: int = int(os.getenv("BATCH_UPLOAD_MAX_FILES", 50))
+    # Worker processes for PDF/DOCX parsing and splitting; defaults to the CPU count.
+    PARSING_MAX_WORKERS: int | None = int(os.getenv("PARSING_MAX_WORKERS")) if os.getenv("PARSING_MAX_WORKERS") else None
+    # Diagnostic switch: records peak memory per parse with tracemalloc. Tracing is
+    # process-wide and slows every thread, and parses that overlap share one peak figure.
+    TRACE_PARSE_MEMORY: bool = os.getenv("TRACE_PARSE_MEMORY", "false").lower() == "true"
+
+    # --- Embedding cache ---
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3")
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 200000))
+
+    # --- RAG agent pool ---
+    RAG_POOL_MAX_SIZE: int = int(os.getenv("RAG_POOL_MAX_SIZE", 128))
+    RAG_POOL_TTL_SECONDS: int = int(os.getenv("RAG_POOL_TTL_SECONDS", 900))
+
+    # --- Semantic answer cache for /ask ---
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.95))
+    ANSWER_CACHE_MAX_ENTRIES_PER_CONSULTATION: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES_PER_CONSULTATION", 50))
+    ANSWER_CACHE_MAX_CONSULTATIONS: int = int(os.getenv("ANSWER_CACHE_MAX_CONSULTATIONS", 500))
+
+    # --- Scribe ---
+    SCRIBE_MAX_CONCURRENT_JOBS: int = int(os.getenv("SCRIBE_MAX_CONCURRENT_JOBS", 4))
+    # "two_step" structures the transcript and then writes the note; "single_pass" does both in one LLM call.
+    SCRIBE_MODE: str = os.getenv("SCRIBE_MODE", "two_step")
+    # Long recordings are transcribed as overlapping segments; 5 min of 16 kHz WAV is ~9.6 MB.
+    SCRIBE_SEGMENT_SECONDS: int = int(os.getenv("SCRIBE_SEGMENT_SECONDS", 300))
+    SCRIBE_SEGMENT_OVERLAP_SECONDS: int = int(os.getenv("SCRIBE_SEGMENT_OVERLAP_SECONDS", 5))
+    SCRIBE_TRANSCRIBE_CONCURRENCY: int = int(os.getenv("SCRIBE_TRANSCRIBE_CONCURRENCY", 8))
+    # Silence trimming before transcription: frames this many dB above the noise floor count as speech,
+    # and only silences longer than the minimum are removed.
+    SCRIBE_VAD_ENABLED: bool = os.getenv("SCRIBE_VAD_ENABLED", "true").lower() == "true"
+    SCRIBE_VAD_MARGIN_DB: float = float(os.getenv("SCRIBE_VAD_MARGIN_DB", 12.0))
+    SCRIBE_VAD_MIN_SILENCE_SECONDS: float = float(os.getenv("SCRIBE_VAD_MIN_SILENCE_SECONDS", 1.0))
+    # Live scribe: how often new audio is transcribed and summarized, and the least new audio worth a round.
+    SCRIBE_LIVE_UPDATE_SECONDS: int = int(os.getenv("SCRIBE_LIVE_UPDATE_SECONDS", 20))
+    SCRIBE_LIVE_MIN_CHUNK_SECONDS: int = int(os.getenv("SCRIBE_LIVE_MIN_CHUNK_SECONDS", 15))
+
+    # --- Prompt context budgets (tokens) ---
+    DDX_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("DDX_CONTEXT_TOKEN_BUDGET", 6000))
+    SUMMARIES_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("SUMMARIES_CONTEXT_TOKEN_BUDGET", 3000))
+
+    # --- Batch DDx generation ---
+    DDX_BATCH_CONCURRENCY: int = int(os.getenv("DDX_BATCH_CONCURRENCY", 4))
+    DDX_BATCH_MAX_CONSULTATIONS: int = int(os.getenv("DDX_BATCH_MAX_CONSULTATIONS", 200))
+
+    # --- Consultation rollup summary ---
+    ROLLUP_MAX_WORDS: int = int(os.getenv("ROLLUP_MAX_WORDS", 500))
+    ROLLUP_MERGE_BATCH_SIZE: int = int(os.getenv("ROLLUP_MERGE_BATCH_SIZE", 10))
+
+    # --- LangGraph checkpoints (resumable Scribe/DDx runs) ---
+    GRAPH_CHECKPOINT_PATH: str = os.getenv("GRAPH_CHECKPOINT_PATH", "cache/graph_checkpoints.sqlite3")
+    # Checkpoints contain transcripts and patient context; runs are deleted this long after their last step.
+    GRAPH_CHECKPOINT_RETENTION_DAYS: float = float(os.getenv("GRAPH_CHECKPOINT_RETENTION_DAYS", 7))
+    GRAPH_CHECKPOINT_PRUNE_INTERVAL_HOURS: float = float(os.getenv("GRAPH_CHECKPOINT_PRUNE_INTERVAL_HOURS", 6))
+
+    # --- Report summarization ---
+    SUMMARY_MAP_CONCURRENCY: int = int(os.getenv("SUMMARY_MAP_CONCURRENCY", 8))
+    SUMMARY_REDUCE_TOKEN_BUDGET: int = int(os.getenv("SUMMARY_REDUCE_TOKEN_BUDGET", 3000))
+    SUMMARY_CACHE_PATH: str = os.getenv("SUMMARY_CACHE_PATH", "cache/summaries.sqlite3")
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 50000))
+
 
 settings = Settings()
 
@@ -3,6 +3,7 @@
 import os
 # Do NOT import mysql.connector directly; SQLAlchemy will handle the driver import as long as the correct driver is installed and DATABASE_URL is set properly.
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
@@ -42,3 +43,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async engine for code running on the event loop (agent tools, async endpoints).
+# Same database, reached through the aiomysql driver.
+async_db_url = db_url.replace("mysql+mysqlconnector://", "mysql+aiomysql://", 1)
+async_engine = create_async_engine(
+    async_db_url,
+    pool_pre_ping=True
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    """
+    Dependency that provides an async database session for each API request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
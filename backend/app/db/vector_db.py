@@ -5,7 +5,11 @@ from app.core.config import settings
 
 # Initialize the Qdrant client
 # This client will be used to interact with the Qdrant vector database.
-qdrant_client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
+# The in-memory mode runs Qdrant inside this process, for benchmarks and offline runs.
+if settings.VECTOR_DB_BACKEND == "memory":
+    qdrant_client = QdrantClient(":memory:")
+else:
+    qdrant_client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
 
 def get_qdrant_client():
     """
@@ -1,11 +1,16 @@
 # backend/app/main.py
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.db.base import Base
 from app.db.session import engine
+from app.agents.checkpointing import close_checkpointer, start_checkpoint_pruning
+from app.services.ingestion_service import get_ingestion_queue
+from app.services.scribe_service import scribe_service
 # --- Updated for Phase 2 ---
-from app.apis.v1 import router_users, router_consultations, router_ai_features, router_patients
+from app.apis.v1 import router_users, router_consultations, router_ai_features, router_patients, router_metrics
 
 # Create all database tables
 Base.metadata.create_all(bind=engine)
@@ -38,6 +43,19 @@ app.include_router(router_consultations.router, prefix="/api/v1", tags=["Consult
 # --- New for Phase 2 ---
 app.include_router(router_ai_features.router, prefix="/api/v1", tags=["AI Features"])
 app.include_router(router_patients.router, prefix="/api/v1", tags=["Patients"])
+app.include_router(router_metrics.router, prefix="/api/v1", tags=["Metrics"])
+
+
+@app.on_event("startup")
+async def startup():
+    start_checkpoint_pruning()
+    await asyncio.to_thread(get_ingestion_queue().requeue_interrupted_jobs)
+    await scribe_service.fail_interrupted_jobs()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_checkpointer()
 
 
 @app.get("/", tags=["Root"])
@@ -25,6 +25,12 @@ class Consultation(Base):
     soap_note = Column(Text, nullable=True)
     # --- New Field for Phase 5 ---
     ddx_result = Column(Text, nullable=True)  # To store the AI-generated Differential Diagnosis
+    # Fingerprint of the data the stored DDx was generated from; unchanged data reuses it.
+    ddx_fingerprint = Column(String(64), nullable=True)
+    # Incrementally maintained summary of the SOAP note and all reports (see rollup_service).
+    rollup_summary = Column(Text, nullable=True)
+    rollup_sources = Column(Text, nullable=True)  # JSON: merged report ids and SOAP note hash
+    rollup_version = Column(Integer, nullable=True)
 
     patient = relationship("User", foreign_keys=[patient_id])
     doctor = relationship("User", foreign_keys=[doctor_id])
@@ -0,0 +1,64 @@
+# backend/app/models/job.py
+
+import enum
+from sqlalchemy import Column, Integer, BigInteger, Float, Enum, DateTime, ForeignKey, String, Text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class IngestionJob(Base):
+    """Tracks the background AI processing of an uploaded medical report."""
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    consultation_id = Column(Integer, ForeignKey("consultations.id"), nullable=False)
+    report_id = Column(Integer, ForeignKey("medical_reports.id"), nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Parsing cost of text reports, recorded by the single-pass document pipeline
+    parse_seconds = Column(Float, nullable=True)
+    parse_peak_memory_bytes = Column(BigInteger, nullable=True)
+
+    report = relationship("MedicalReport")
+
+    @property
+    def summary(self):
+        """The report summary, only exposed once the job has finished."""
+        if self.status == JobStatus.DONE and self.report is not None:
+            return self.report.summary
+        return None
+
+
+class ScribeJob(Base):
+    """Tracks a background Scribe run (audio to SOAP note) for a consultation."""
+    __tablename__ = "scribe_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    consultation_id = Column(Integer, ForeignKey("consultations.id"), nullable=False)
+    # Graph run id; a failed job can be resumed from its checkpoints with it.
+    run_id = Column(String(32), nullable=True)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    consultation = relationship("Consultation")
+
+    @property
+    def soap_note(self):
+        """The generated note, only exposed once the job has finished."""
+        if self.status == JobStatus.DONE and self.consultation is not None:
+            return self.consultation.soap_note
+        return None
@@ -1,6 +1,8 @@
 # backend/app/schemas/ai_schema.py
 
 from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
 
 class QuestionRequest(BaseModel):
     """Schema for the question request body."""
@@ -9,3 +11,33 @@ class QuestionRequest(BaseModel):
 class AnswerResponse(BaseModel):
     """Schema for the answer response body."""
     answer: str
+
+class DdxBatchRequest(BaseModel):
+    """
+    Consultations to generate a DDx for: explicit ids, or the requesting
+    doctor's schedule between two dates (inclusive; defaults to today).
+    `doctor_id`, if given, must be the requesting doctor.
+    """
+    consultation_ids: Optional[List[int]] = None
+    doctor_id: Optional[int] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    force: bool = False
+
+class DdxBatchItem(BaseModel):
+    """Outcome for one consultation in a DDx batch."""
+    consultation_id: int
+    status: str
+    error: Optional[str] = None
+    run_id: Optional[str] = None
+
+class DdxBatchResponse(BaseModel):
+    """Per-consultation outcomes and totals of a DDx batch."""
+    items: List[DdxBatchItem]
+    total: int
+    generated: int
+    reused: int
+    failed: int
+    not_found: int
+    seconds: float
+    consultations_per_minute: float
@@ -0,0 +1,49 @@
+# backend/app/schemas/job_schema.py
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List
+from app.models.job import JobStatus
+
+class IngestionJobOut(BaseModel):
+    """Status of a background report-processing job."""
+    id: int
+    consultation_id: int
+    report_id: int
+    status: JobStatus
+    summary: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    parse_seconds: Optional[float] = None
+    parse_peak_memory_bytes: Optional[int] = None
+
+    class Config:
+        orm_mode = True
+
+class BatchUploadItemOut(BaseModel):
+    """Outcome of one file in a batch upload."""
+    filename: str
+    accepted: bool
+    job: Optional[IngestionJobOut] = None
+    error: Optional[str] = None
+
+class BatchUploadOut(BaseModel):
+    results: List[BatchUploadItemOut]
+
+
+class ScribeJobOut(BaseModel):
+    """Status of a background Scribe run."""
+    id: int
+    consultation_id: int
+    run_id: Optional[str] = None
+    status: JobStatus
+    soap_note: Optional[str] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
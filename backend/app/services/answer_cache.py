@@ -0,0 +1,140 @@
+# backend/app/services/answer_cache.py
+
+import asyncio
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.consultation_service import AsyncConsultationService
+from app.services.embedding_cache import with_embedding_cache
+from app.services.llm_gateway import llm_gateway
+from app.services.vector_index_service import add_index_listener
+
+
+@dataclass
+class AnswerLookup:
+    """Result of a cache lookup; pass it back to `store` after answering a miss."""
+    consultation_id: int
+    state_version: str
+    question_embedding: List[float]
+    answer: Optional[str] = None
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class SemanticAnswerCache:
+    """
+    Per-consultation cache of agent answers, matched by question embedding
+    similarity. Entries are tied to a fingerprint of the consultation's notes,
+    SOAP note, DDx and report summaries, so any change to those (a new upload,
+    a regenerated note or DDx) invalidates them, even if made by another process.
+    """
+
+    def __init__(self, similarity_threshold: float, max_entries_per_consultation: int, max_consultations: int):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_consultation = max_entries_per_consultation
+        self.max_consultations = max_consultations
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        # consultation_id -> (state_version, [(normalized embedding, answer, latency_seconds)])
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._embeddings = None
+
+    def _get_embeddings(self):
+        if self._embeddings is None:
+            self._embeddings = with_embedding_cache(llm_gateway.embeddings())
+        return self._embeddings
+
+    async def state_version(self, consultation_id: int) -> str:
+        """Fingerprint of everything the agent can read about a consultation."""
+        async with AsyncSessionLocal() as db:
+            service = AsyncConsultationService(db)
+            consultation = await service.get_consultation_by_id(consultation_id)
+            reports = await service.get_reports_for_consultation(consultation_id)
+        digest = hashlib.sha256()
+        if consultation is not None:
+            for part in (consultation.notes, consultation.soap_note, consultation.ddx_result):
+                digest.update((part or "").encode("utf-8") + b"\0")
+        for report in sorted(reports, key=lambda r: r.id):
+            digest.update(f"{report.id}:{report.summary or ''}".encode("utf-8") + b"\0")
+        return digest.hexdigest()
+
+    async def lookup(self, consultation_id: int, question: str) -> AnswerLookup:
+        state_version, raw_embedding = await asyncio.gather(
+            self.state_version(consultation_id),
+            self._get_embeddings().aembed_query(question),
+        )
+        question_embedding = _normalize(raw_embedding)
+        result = AnswerLookup(consultation_id, state_version, question_embedding)
+
+        with self._lock:
+            cached = self._entries.get(consultation_id)
+            if cached is not None and cached[0] != state_version:
+                del self._entries[consultation_id]
+                cached = None
+            best = None
+            if cached is not None:
+                self._entries.move_to_end(consultation_id)
+                scored = [(_dot(question_embedding, entry[0]), entry) for entry in cached[1]]
+                if scored:
+                    best = max(scored, key=lambda item: item[0])
+            if best is not None and best[0] >= self.similarity_threshold:
+                self.hits += 1
+                self.saved_seconds += best[1][2]
+                result.answer = best[1][1]
+            else:
+                self.misses += 1
+        return result
+
+    def store(self, lookup: AnswerLookup, answer: str, latency_seconds: float):
+        with self._lock:
+            cached = self._entries.get(lookup.consultation_id)
+            if cached is None or cached[0] != lookup.state_version:
+                cached = (lookup.state_version, [])
+                self._entries[lookup.consultation_id] = cached
+            entries = cached[1]
+            entries.append((lookup.question_embedding, answer, latency_seconds))
+            del entries[:-self.max_entries_per_consultation]
+            self._entries.move_to_end(lookup.consultation_id)
+            while len(self._entries) > self.max_consultations:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, consultation_id: int):
+        with self._lock:
+            self._entries.pop(consultation_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "consultations": len(self._entries),
+                "similarity_threshold": self.similarity_threshold,
+            }
+
+
+semantic_answer_cache = SemanticAnswerCache(
+    similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    max_entries_per_consultation=settings.ANSWER_CACHE_MAX_ENTRIES_PER_CONSULTATION,
+    max_consultations=settings.ANSWER_CACHE_MAX_CONSULTATIONS,
+)
+
+# Drop this process's entries right away when a consultation's reports are re-indexed.
+add_index_listener(semantic_answer_cache.invalidate)
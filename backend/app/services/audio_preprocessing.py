@@ -0,0 +1,109 @@
+# backend/app/services/audio_preprocessing.py
+
+import asyncio
+import os
+import tempfile
+from dataclasses import dataclass
+import numpy as np
+
+from app.services.transcription_service import BYTES_PER_SECOND, SAMPLE_RATE, decode_to_pcm
+
+# 30 ms analysis frames, the usual granularity for energy-based VAD.
+FRAME_SAMPLES = SAMPLE_RATE * 30 // 1000
+# Frames this far below full scale are silence no matter how quiet the room is.
+ABSOLUTE_SILENCE_DB = -55.0
+# The noise floor is estimated from the quietest frames of the recording.
+NOISE_FLOOR_PERCENTILE = 10
+# Speech kept on either side of each detected span, so word onsets and tails survive.
+SPEECH_PADDING_SECONDS = 0.3
+# Trimming is only worth it if this share of the recording is removed.
+MIN_REMOVED_RATIO = 0.1
+
+
+@dataclass
+class PreparedAudio:
+    """
+    A decoded recording, written as raw PCM (see `decode_to_pcm`) so it is not
+    decoded again for transcription. `trimmed` says whether long silences were
+    removed; if not, the PCM is the whole recording.
+    """
+    pcm_path: str
+    trimmed: bool
+    original_seconds: float
+    speech_seconds: float
+
+    @property
+    def removed_seconds(self) -> float:
+        return self.original_seconds - self.speech_seconds
+
+
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def speech_frames(samples: np.ndarray, margin_db: float, min_silence_seconds: float) -> np.ndarray:
+    """
+    Energy-based voice activity detection. Returns one flag per frame: True for
+    frames to keep. A frame is speech if its RMS level is `margin_db` above the
+    recording's noise floor; silences shorter than `min_silence_seconds` are
+    natural pauses and kept.
+    """
+    frame_count = len(samples) // FRAME_SAMPLES
+    if frame_count == 0:
+        return np.ones(0, dtype=bool)
+    frames = samples[:frame_count * FRAME_SAMPLES].astype(np.float32).reshape(frame_count, FRAME_SAMPLES) / 32768.0
+    level_db = 20.0 * np.log10(np.sqrt(np.mean(frames * frames, axis=1)) + 1e-10)
+    threshold_db = max(np.percentile(level_db, NOISE_FLOOR_PERCENTILE) + margin_db, ABSOLUTE_SILENCE_DB)
+    speech = level_db > threshold_db
+
+    padding = int(SPEECH_PADDING_SECONDS * SAMPLE_RATE / FRAME_SAMPLES)
+    keep = np.convolve(speech, np.ones(2 * padding + 1), mode="same") > 0
+
+    # Start/end of every silent run, from the edges of the inverted mask.
+    edges = np.diff(np.concatenate(([0], (~keep).astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    min_silence_frames = int(min_silence_seconds * SAMPLE_RATE / FRAME_SAMPLES)
+    for start, end in zip(starts, ends):
+        if end - start < min_silence_frames:
+            keep[start:end] = True
+    return keep
+
+
+def trim_silence(pcm: bytes, margin_db: float, min_silence_seconds: float) -> bytes:
+    """Drops long silent spans from 16-bit mono PCM and packs the remaining speech together."""
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    keep = speech_frames(samples, margin_db, min_silence_seconds)
+    if not keep.any():
+        return b""
+    sample_mask = np.repeat(keep, FRAME_SAMPLES)
+    # The trailing partial frame follows the last full frame.
+    sample_mask = np.concatenate((sample_mask, np.full(len(samples) - len(sample_mask), keep[-1])))
+    return samples[sample_mask].tobytes()
+
+
+async def prepare_audio(file_path: str, margin_db: float, min_silence_seconds: float) -> PreparedAudio:
+    """
+    Decodes a recording and removes its long silences, writing the result to a
+    temporary raw PCM file. When there is too little silence to be worth it (or
+    no detectable speech at all) the whole recording is written instead.
+    """
+    pcm = await decode_to_pcm(file_path)
+    trimmed = await asyncio.to_thread(trim_silence, pcm, margin_db, min_silence_seconds)
+    original_seconds = len(pcm) / BYTES_PER_SECOND
+    worth_trimming = bool(trimmed) and len(trimmed) / BYTES_PER_SECOND <= original_seconds * (1 - MIN_REMOVED_RATIO)
+    speech = trimmed if worth_trimming else pcm
+
+    fd, pcm_path = tempfile.mkstemp(prefix="scribe_speech_", suffix=".pcm")
+    os.close(fd)
+    try:
+        await asyncio.to_thread(_write_file, pcm_path, speech)
+    except Exception:
+        os.remove(pcm_path)
+        raise
+    return PreparedAudio(
+        pcm_path=pcm_path,
+        trimmed=worth_trimming,
+        original_seconds=original_seconds,
+        speech_seconds=len(speech) / BYTES_PER_SECOND,
+    )
@@ -2,22 +2,27 @@
 
 import os
 import shutil
+import uuid
+from datetime import datetime
 from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload # <--- This is the missing import
 from typing import List
 
 from app.models.consultation import Consultation, MedicalReport
+from app.models.job import IngestionJob, JobStatus
 from app.schemas.consultation_schema import ConsultationCreate
-from app.services.document_service import DocumentService
-from app.db.vector_db import get_qdrant_client
+from app.services.document_service import TEXT_EXTENSIONS, IMAGE_EXTENSIONS
+from app.services.ingestion_service import get_ingestion_queue
 
 UPLOAD_DIRECTORY = "uploads"
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
 
 
 class ConsultationService:
     def __init__(self, db: Session):
         self.db = db
-        self.document_service = DocumentService(get_qdrant_client())
         if not os.path.exists(UPLOAD_DIRECTORY):
             os.makedirs(UPLOAD_DIRECTORY)
 
@@ -37,38 +42,76 @@ class ConsultationService:
     def get_consultation_by_id(self, consultation_id: int) -> Consultation | None:
         return self.db.query(Consultation).filter(Consultation.id == consultation_id).first()
 
-    def save_report_file(self, consultation_id: int, file: UploadFile) -> MedicalReport:
-        """
-        Saves an uploaded report file, triggers AI processing to get a summary,
-        and saves the report details (including summary) to the database.
-        """
-        file_location = os.path.join(UPLOAD_DIRECTORY, f"consult_{consultation_id}_{file.filename}")
+    def _store_upload(self, consultation_id: int, file: UploadFile) -> MedicalReport:
+        """Streams an uploaded file to disk and adds (but does not commit) its report record."""
+        # A unique prefix keeps same-named uploads (in one batch or across requests) from overwriting each other.
+        file_name = os.path.basename(file.filename or "upload")
+        file_location = os.path.join(UPLOAD_DIRECTORY, f"consult_{consultation_id}_{uuid.uuid4().hex}_{file_name}")
 
         with open(file_location, "wb+") as file_object:
-            shutil.copyfileobj(file.file, file_object)
-
-        # Trigger AI processing to get summary
-        summary_text = ""
-        try:
-            summary_text = self.document_service.process_and_store_report(
-                file_path=file_location,
-                consultation_id=consultation_id
-            )
-        except Exception as e:
-            print(f"ERROR: AI processing failed for file {file.filename}. Error: {e}")
-            summary_text = "AI summary could not be generated for this document."
+            shutil.copyfileobj(file.file, file_object, UPLOAD_COPY_BUFFER_SIZE)
 
-        # Create a database record for the report with the summary
         db_report = MedicalReport(
             consultation_id=consultation_id,
-            file_path=file_location,
-            summary=summary_text
+            file_path=file_location
         )
         self.db.add(db_report)
-        self.db.commit()
-        self.db.refresh(db_report)
         return db_report
 
+    def _add_job(self, consultation_id: int, report: MedicalReport) -> IngestionJob:
+        db_job = IngestionJob(
+            consultation_id=consultation_id,
+            report=report,
+            status=JobStatus.PENDING
+        )
+        self.db.add(db_job)
+        return db_job
+
+    def save_report_file(self, consultation_id: int, file: UploadFile) -> IngestionJob:
+        """
+        Saves an uploaded report file and its database record, then queues the
+        AI processing (embedding and summary) as a background ingestion job.
+        The report summary is filled in when the job completes.
+        """
+        db_report = self._store_upload(consultation_id, file)
+        db_job = self._add_job(consultation_id, db_report)
+        self.db.commit()
+        self.db.refresh(db_job)
+
+        get_ingestion_queue().submit(db_job.id)
+        return db_job
+
+    def save_report_files(self, consultation_id: int, files: List[UploadFile]) -> List[dict]:
+        """
+        Saves a batch of uploaded report files, writes all their report and job
+        records in one transaction and queues them as a single ingestion batch.
+        Unsupported file types are rejected individually; returns one result per file.
+        """
+        results = []
+        jobs = []
+        for file in files:
+            file_ext_lower = os.path.splitext(file.filename or "")[1].lower()
+            if file_ext_lower not in TEXT_EXTENSIONS + IMAGE_EXTENSIONS:
+                results.append({
+                    "filename": file.filename,
+                    "accepted": False,
+                    "error": f"Unsupported file type: {file_ext_lower or 'unknown'}"
+                })
+                continue
+            db_job = self._add_job(consultation_id, self._store_upload(consultation_id, file))
+            jobs.append(db_job)
+            results.append({"filename": file.filename, "accepted": True, "job": db_job})
+
+        if jobs:
+            self.db.commit()
+            for db_job in jobs:
+                self.db.refresh(db_job)
+            get_ingestion_queue().submit_batch([db_job.id for db_job in jobs])
+        return results
+
+    def get_job_by_id(self, job_id: int) -> IngestionJob | None:
+        return self.db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+
     def get_reports_for_consultation(self, consultation_id: int) -> List[MedicalReport]:
         """
         Retrieves all medical reports for a given consultation.
@@ -91,3 +134,52 @@ class ConsultationService:
             .order_by(Consultation.scheduled_time.desc())
             .all()
         )
+
+    def get_consultation_ids_scheduled(self, *, doctor_id: int, start: datetime, end: datetime) -> List[int]:
+        """
+        Ids of a doctor's consultations scheduled in [start, end), in schedule order.
+        """
+        rows = (
+            self.db.query(Consultation.id)
+            .filter(
+                Consultation.doctor_id == doctor_id,
+                Consultation.scheduled_time >= start,
+                Consultation.scheduled_time < end
+            )
+            .order_by(Consultation.scheduled_time)
+            .all()
+        )
+        return [row.id for row in rows]
+
+    def get_consultation_ids_of_doctor(self, *, doctor_id: int, consultation_ids: List[int]) -> List[int]:
+        """
+        The given consultation ids that belong to the doctor, in the given order.
+        """
+        rows = (
+            self.db.query(Consultation.id)
+            .filter(Consultation.doctor_id == doctor_id, Consultation.id.in_(consultation_ids))
+            .all()
+        )
+        owned = {row.id for row in rows}
+        return [consultation_id for consultation_id in consultation_ids if consultation_id in owned]
+
+
+class AsyncConsultationService:
+    """
+    Async counterpart of ConsultationService for code running on the event loop
+    (agent tools, async endpoints), so database reads never block it.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_consultation_by_id(self, consultation_id: int) -> Consultation | None:
+        result = await self.db.execute(select(Consultation).where(Consultation.id == consultation_id))
+        return result.scalars().first()
+
+    async def get_reports_for_consultation(self, consultation_id: int) -> List[MedicalReport]:
+        """
+        Retrieves all medical reports for a given consultation.
+        """
+        result = await self.db.execute(select(MedicalReport).where(MedicalReport.consultation_id == consultation_id))
+        return list(result.scalars().all())
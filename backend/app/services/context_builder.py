@@ -0,0 +1,116 @@
+# backend/app/services/context_builder.py
+
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import tiktoken
+
+from app.core.config import settings
+
+# Sections that would be cut below this many tokens are dropped instead.
+MIN_TRUNCATED_SECTION_TOKENS = 64
+TRUNCATION_MARKER = " ... [truncated]"
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+
+def _get_encoding(model: str):
+    with _encodings_lock:
+        if model not in _encodings:
+            if settings.LLM_BACKEND == "fake":
+                # tiktoken downloads its vocabularies on first use, which needs network access.
+                from app.services.fake_backends import FakeEncoding
+                _encodings[model] = FakeEncoding()
+                return _encodings[model]
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("cl100k_base")
+        return _encodings[model]
+
+
+@dataclass
+class ContextSection:
+    """
+    One piece of prompt context. Sections are rendered in the order given;
+    `rank` decides which ones are kept when the budget runs out (lower ranks
+    first). Consecutive sections with the same `group` share one heading.
+    """
+    text: str
+    rank: Tuple = (0,)
+    group: Optional[str] = None
+
+
+@dataclass
+class BuiltContext:
+    text: str
+    included_tokens: int
+    dropped_tokens: int
+    truncated_sections: int = 0
+    dropped_sections: int = 0
+    token_budget: int = 0
+
+    def stats(self) -> dict:
+        return {
+            "included_tokens": self.included_tokens,
+            "dropped_tokens": self.dropped_tokens,
+            "truncated_sections": self.truncated_sections,
+            "dropped_sections": self.dropped_sections,
+            "token_budget": self.token_budget,
+        }
+
+
+@dataclass
+class _Selection:
+    section: ContextSection
+    tokens: List[int]
+    kept: List[int] = field(default_factory=list)
+
+
+class ContextBuilder:
+    """
+    Assembles prompt context from ranked sections within a token budget. The
+    highest-ranked sections are kept whole; the first one that does not fit is
+    truncated (if enough budget is left to be useful) and the rest are dropped.
+    Token counts use the target model's tokenizer.
+    """
+
+    def __init__(self, token_budget: int, model: str = "gpt-4o"):
+        self.token_budget = token_budget
+        self.model = model
+
+    def build(self, sections: List[ContextSection], separator: str = "\n\n") -> BuiltContext:
+        encoding = _get_encoding(self.model)
+        selections = [_Selection(section, encoding.encode(section.text)) for section in sections]
+
+        remaining = self.token_budget
+        built = BuiltContext(text="", included_tokens=0, dropped_tokens=0, token_budget=self.token_budget)
+        for selection in sorted(selections, key=lambda s: s.section.rank):
+            count = len(selection.tokens)
+            if count <= remaining:
+                selection.kept = selection.tokens
+            elif remaining >= MIN_TRUNCATED_SECTION_TOKENS:
+                selection.kept = selection.tokens[:remaining]
+                built.truncated_sections += 1
+            else:
+                built.dropped_sections += 1
+            remaining -= len(selection.kept)
+            built.included_tokens += len(selection.kept)
+            built.dropped_tokens += count - len(selection.kept)
+
+        parts, group = [], None
+        for selection in selections:
+            if not selection.kept:
+                continue
+            text = encoding.decode(selection.kept)
+            if len(selection.kept) < len(selection.tokens):
+                text += TRUNCATION_MARKER
+            if selection.section.group and selection.section.group != group:
+                text = f"{selection.section.group}\n{text}"
+            group = selection.section.group
+            parts.append(text)
+        if built.dropped_sections:
+            parts.append(f"[{built.dropped_sections} lower-priority section(s) omitted to fit the context budget]")
+        built.text = separator.join(parts)
+        return built
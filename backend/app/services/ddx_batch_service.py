@@ -0,0 +1,129 @@
+# backend/app/services/ddx_batch_service.py
+
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import update
+
+from app.agents.checkpointing import graph_run_config
+from app.agents.graph_builder import agent_graphs, new_run_id
+from app.agents.nodes.diagnosis_nodes import gather_patient_data_bulk
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.consultation import Consultation
+from app.services.consultation_service import ConsultationService
+
+
+def scheduled_consultation_ids(doctor_id: int, date_from: Optional[date] = None,
+                               date_to: Optional[date] = None) -> List[int]:
+    """A doctor's consultations scheduled from `date_from` to `date_to` inclusive (default: today)."""
+    date_from = date_from or date.today()
+    date_to = date_to or date_from
+    db = SessionLocal()
+    try:
+        return ConsultationService(db).get_consultation_ids_scheduled(
+            doctor_id=doctor_id,
+            start=datetime.combine(date_from, datetime.min.time()),
+            end=datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+        )
+    finally:
+        db.close()
+
+
+def doctor_consultation_ids(doctor_id: int, consultation_ids: List[int]) -> List[int]:
+    """The consultations in `consultation_ids` that belong to the doctor."""
+    db = SessionLocal()
+    try:
+        return ConsultationService(db).get_consultation_ids_of_doctor(
+            doctor_id=doctor_id, consultation_ids=consultation_ids
+        )
+    finally:
+        db.close()
+
+
+def _save_results(results: List[dict]) -> None:
+    """Writes all generated DDx reports in one bulk UPDATE."""
+    db = SessionLocal()
+    try:
+        db.execute(update(Consultation), results)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_ddx_batch(consultation_ids: List[int], force: bool = False,
+                        max_concurrency: Optional[int] = None) -> dict:
+    """
+    Generates the DDx for many consultations at once, e.g. a doctor's schedule
+    for the day. Patient data is gathered in a few bulk queries, the DDx graph
+    runs for all consultations with at most `max_concurrency` in flight, and the
+    new reports are written in one bulk update. Unchanged consultations reuse
+    their stored DDx unless `force` is set. Each graph run is checkpointed under
+    its own run id, like a single DDx request.
+
+    Returns per-consultation status (`generated`, `reused`, `failed` or
+    `not_found`) and the batch's totals and throughput.
+    """
+    max_concurrency = max_concurrency or settings.DDX_BATCH_CONCURRENCY
+    consultation_ids = list(dict.fromkeys(consultation_ids))
+    started = time.perf_counter()
+
+    contexts = await asyncio.to_thread(gather_patient_data_bulk, consultation_ids, force)
+    items = {consultation_id: {"consultation_id": consultation_id, "status": None, "error": None, "run_id": None}
+             for consultation_id in consultation_ids}
+    inputs, configs = [], []
+    for consultation_id in consultation_ids:
+        context = contexts[consultation_id]
+        if context.get("error"):
+            items[consultation_id].update(status="not_found", error=context["error"])
+            continue
+        run_id = new_run_id()
+        items[consultation_id]["run_id"] = run_id
+        inputs.append({**context, "consultation_id": consultation_id, "run_id": run_id,
+                       "force": force, "defer_save": True})
+        configs.append({**graph_run_config("ddx", consultation_id, run_id), "max_concurrency": max_concurrency})
+
+    runnable = await agent_graphs.get_runnable("ddx")
+    final_states = await runnable.abatch(inputs, configs, return_exceptions=True) if inputs else []
+
+    to_save = []
+    for initial_state, final_state in zip(inputs, final_states):
+        item = items[initial_state["consultation_id"]]
+        if isinstance(final_state, Exception):
+            item.update(status="failed", error=str(final_state))
+        elif final_state.get("error"):
+            item.update(status="failed", error=final_state["error"])
+        elif final_state.get("cache_hit"):
+            item["status"] = "reused"
+        else:
+            item["status"] = "generated"
+            to_save.append({
+                "id": item["consultation_id"],
+                "ddx_result": final_state["ddx_result"],
+                "ddx_fingerprint": final_state.get("context_fingerprint"),
+            })
+
+    if to_save:
+        try:
+            await asyncio.to_thread(_save_results, to_save)
+        except Exception as e:
+            print(f"ERROR: Saving the DDx batch failed. Error: {e}")
+            for result in to_save:
+                items[result["id"]].update(status="failed", error=f"Failed to save DDx to database: {e}")
+
+    seconds = time.perf_counter() - started
+    counts = {status: 0 for status in ("generated", "reused", "failed", "not_found")}
+    for item in items.values():
+        counts[item["status"]] += 1
+    print(f"DDx batch: {len(consultation_ids)} consultation(s) in {seconds:.1f}s {counts}")
+    return {
+        "items": list(items.values()),
+        "total": len(consultation_ids),
+        **counts,
+        "seconds": seconds,
+        "consultations_per_minute": len(consultation_ids) / seconds * 60 if seconds else 0.0,
+    }
@@ -0,0 +1,179 @@
+# backend/app/services/document_parsing.py
+#
+# Kept free of app-level imports (settings, DB, API clients) so worker
+# processes can import it cheaply.
+
+import multiprocessing
+import os
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+# tracemalloc is process-wide, so concurrent parses share one tracing session.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+@dataclass
+class ParsedDocument:
+    """A text report parsed once and shared by the splitter, embedder and summarizer."""
+    file_path: str
+    pages: List[Document]
+    chunks: List[Document]
+    parse_seconds: float
+    peak_memory_bytes: Optional[int]
+
+
+# What a worker process sends back: plain tuples instead of pickled Documents.
+# pages: (text, metadata); chunks: (page index, start offset, length), or
+# (page index, text) when a chunk is not a verbatim slice of its page.
+CompactPage = Tuple[str, dict]
+CompactChunk = Union[Tuple[int, int, int], Tuple[int, str]]
+CompactParse = Tuple[List[CompactPage], List[CompactChunk], float, Optional[int]]
+
+
+def _start_memory_tracing():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+        _tracemalloc_users += 1
+
+
+def _stop_memory_tracing() -> int:
+    """Stops tracing for this caller and returns the peak traced memory in bytes."""
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _, peak = tracemalloc.get_traced_memory()
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+        return peak
+
+
+def _load_pages(file_path: str) -> List[Document]:
+    _, file_extension = os.path.splitext(file_path)
+    if file_extension.lower() == '.pdf':
+        loader = PyPDFLoader(file_path)
+    elif file_extension.lower() == '.docx':
+        loader = Docx2txtLoader(file_path)
+    else:
+        raise ValueError(f"Unsupported text file type: {file_extension}")
+    return loader.load()
+
+
+def parse_and_split(file_path: str, chunk_size: int, chunk_overlap: int, trace_memory: bool) -> CompactParse:
+    """
+    Parses a text-based document (PDF, DOCX) and splits it into chunks.
+    Runs inside a worker process, so the returned value is kept small and
+    cheap to pickle. Peak memory covers parsing only.
+    """
+    if trace_memory:
+        _start_memory_tracing()
+    started = time.perf_counter()
+    try:
+        pages = _load_pages(file_path)
+    finally:
+        parse_seconds = time.perf_counter() - started
+        peak_memory_bytes = _stop_memory_tracing() if trace_memory else None
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len, add_start_index=True
+    )
+    compact_chunks = []
+    for page_index, page in enumerate(pages):
+        for chunk in splitter.split_documents([page]):
+            start = chunk.metadata.get("start_index", -1)
+            length = len(chunk.page_content)
+            if start >= 0 and page.page_content[start:start + length] == chunk.page_content:
+                compact_chunks.append((page_index, start, length))
+            else:
+                compact_chunks.append((page_index, chunk.page_content))
+
+    compact_pages = [(page.page_content, page.metadata) for page in pages]
+    return compact_pages, compact_chunks, parse_seconds, peak_memory_bytes
+
+
+def _expand(file_path: str, compact: CompactParse) -> ParsedDocument:
+    compact_pages, compact_chunks, parse_seconds, peak_memory_bytes = compact
+    pages = [Document(page_content=text, metadata=metadata) for text, metadata in compact_pages]
+    chunks = []
+    for compact_chunk in compact_chunks:
+        page = pages[compact_chunk[0]]
+        if len(compact_chunk) == 3:
+            _, start, length = compact_chunk
+            text = page.page_content[start:start + length]
+            metadata = dict(page.metadata, start_index=start)
+        else:
+            text = compact_chunk[1]
+            metadata = dict(page.metadata)
+        chunks.append(Document(page_content=text, metadata=metadata))
+
+    memory_text = f"{peak_memory_bytes / (1024 * 1024):.1f} MiB" if peak_memory_bytes is not None else "not traced"
+    print(
+        f"Parsed {file_path}: {len(pages)} pages, {len(chunks)} chunks in {parse_seconds:.2f}s, "
+        f"peak memory {memory_text}"
+    )
+    return ParsedDocument(
+        file_path=file_path,
+        pages=pages,
+        chunks=chunks,
+        parse_seconds=parse_seconds,
+        peak_memory_bytes=peak_memory_bytes
+    )
+
+
+class DocumentParsingService:
+    """
+    Runs CPU-bound parsing and text splitting on a pool of worker processes, so
+    it neither holds the API process's GIL nor limits ingestion to one core.
+    """
+
+    def __init__(self, max_workers: int, chunk_size: int, chunk_overlap: int, trace_memory: bool):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.trace_memory = trace_memory
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # 'spawn' avoids forking a process that already runs threads and holds sockets.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _submit(self, file_path: str):
+        return self._get_pool().submit(
+            parse_and_split, file_path, self.chunk_size, self.chunk_overlap, self.trace_memory
+        )
+
+    def parse(self, file_path: str) -> ParsedDocument:
+        """Parses and splits one document in a worker process."""
+        return _expand(file_path, self._submit(file_path).result())
+
+    def parse_many(self, file_paths: List[str]) -> List[Union[ParsedDocument, Exception]]:
+        """
+        Parses several documents in parallel. Results are returned in input
+        order; a file that fails to parse yields its exception instead.
+        """
+        futures = [self._submit(file_path) for file_path in file_paths]
+        results = []
+        for file_path, future in zip(file_paths, futures):
+            try:
+                results.append(_expand(file_path, future.result()))
+            except Exception as e:
+                results.append(e)
+        return results
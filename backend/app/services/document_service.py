@@ -1,21 +1,46 @@
 # backend/app/services/document_service.py
 
 import os
+import asyncio
 import base64
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import Qdrant
-from langchain.chains.summarize import load_summarize_chain
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
 from qdrant_client import QdrantClient
 from langchain_core.messages import HumanMessage
 
+from app.core.background_loop import run_sync
 from app.core.config import settings
+from app.services.document_parsing import DocumentParsingService, ParsedDocument
+from app.services.embedding_cache import with_embedding_cache
+from app.services.llm_gateway import llm_gateway
+from app.services.summarization_service import SummarizationEngine
+from app.services.image_preprocessing import prepare_image
+from app.services.summary_cache import summary_cache, content_key
+from app.services.vector_index_service import VectorIndexService
 
 # Define supported file types
 TEXT_EXTENSIONS = ['.pdf', '.docx']
 IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp']
 
+IMAGE_SUMMARY_PROMPT = "You are an expert radiologist. Analyze this medical image (e.g., X-ray, MRI) and provide a concise, descriptive summary of your findings. Describe any anomalies, their locations, and potential implications. If the image is not a medical image, state that clearly."
+IMAGE_SUMMARY_CACHE_NAMESPACE = "image_summary"
+
+# Shared by every DocumentService; worker processes are started on first use.
+parsing_service = DocumentParsingService(
+    max_workers=settings.PARSING_MAX_WORKERS,
+    chunk_size=1000,
+    chunk_overlap=200,
+    trace_memory=settings.TRACE_PARSE_MEMORY,
+)
+
+
+@dataclass
+class ProcessedReport:
+    """Result of processing one uploaded report."""
+    summary: str
+    parse_seconds: Optional[float] = None
+    peak_memory_bytes: Optional[int] = None
+
 
 class DocumentService:
     """
@@ -25,35 +50,45 @@ class DocumentService:
 
     def __init__(self, qdrant_client: QdrantClient):
         self.qdrant_client = qdrant_client
-        self.embeddings = OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY)
-        self.llm = ChatOpenAI(temperature=0, model_name="gpt-4o", api_key=settings.OPENAI_API_KEY)
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, chunk_overlap=200, length_function=len
+        # Model clients come from the shared gateway, so building a service per request is cheap.
+        self.embeddings = with_embedding_cache(llm_gateway.embeddings())
+        self.vector_index = VectorIndexService(qdrant_client, self.embeddings)
+        self.llm = llm_gateway.chat("image_summary", temperature=0)
+        self.parsing_service = parsing_service
+        self.summarizer = SummarizationEngine(
+            llm_gateway.chat("summary_map", temperature=0), summary_cache,
+            reduce_llm=llm_gateway.chat("summary_reduce", temperature=0)
         )
 
-    def _generate_summary_for_text(self, file_path: str) -> str:
-        """Generates a summary for text-based documents (PDF, DOCX)."""
-        print(f"--- Generating summary for TEXT document: {file_path} ---")
-        _, file_extension = os.path.splitext(file_path)
-        if file_extension.lower() == '.pdf':
-            loader = PyPDFLoader(file_path)
-        elif file_extension.lower() == '.docx':
-            loader = Docx2txtLoader(file_path)
-        else:
-            # This should not be reached due to the router logic
-            raise ValueError(f"Unsupported text file type: {file_extension}")
+    def parse_document(self, file_path: str) -> ParsedDocument:
+        """Parses and splits a text-based document (PDF, DOCX) on the parsing pool."""
+        return self.parsing_service.parse(file_path)
 
-        documents = loader.load()
-        summarize_chain = load_summarize_chain(self.llm, chain_type="map_reduce")
-        summary_result = summarize_chain.run(documents)
-        return summary_result
+    def _generate_summary_for_text(self, parsed: ParsedDocument) -> str:
+        """Generates a summary for an already parsed text document (PDF, DOCX)."""
+        print(f"--- Generating summary for TEXT document: {parsed.file_path} ---")
+        return run_sync(self.summarizer.summarize(parsed.pages))
 
     def _generate_summary_for_image(self, file_path: str) -> str:
-        """Generates a descriptive summary for an image file."""
+        """
+        Generates a descriptive summary for an image file. The image is downscaled
+        before upload, and summaries are cached by an exact hash of the prepared
+        image, so re-uploads of the same file skip the vision call.
+        """
         print(f"--- Generating summary for IMAGE document: {file_path} ---")
-        # 1. Encode the image to base64
-        with open(file_path, "rb") as image_file:
-            image_base64 = base64.b64encode(image_file.read()).decode('utf-8')
+        # 1. Downscale, re-encode and fingerprint the image
+        image = prepare_image(file_path)
+        print(
+            f"Prepared image {file_path}: {image.width}x{image.height} {image.mime_type}, "
+            f"{image.original_size_bytes} -> {len(image.data)} bytes"
+        )
+        cache_key = content_key(self.llm.model_name, IMAGE_SUMMARY_PROMPT, image.content_hash)
+        cached_summary = summary_cache.get(IMAGE_SUMMARY_CACHE_NAMESPACE, cache_key)
+        if cached_summary is not None:
+            print(f"Using cached summary for image {file_path}")
+            return cached_summary
+
+        image_base64 = base64.b64encode(image.data).decode('utf-8')
 
         # 2. Call the multimodal LLM
         prompt = [
@@ -61,12 +96,12 @@ class DocumentService:
                 content=[
                     {
                         "type": "text",
-                        "text": "You are an expert radiologist. Analyze this medical image (e.g., X-ray, MRI) and provide a concise, descriptive summary of your findings. Describe any anomalies, their locations, and potential implications. If the image is not a medical image, state that clearly.",
+                        "text": IMAGE_SUMMARY_PROMPT,
                     },
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_base64}",
+                            "url": f"data:{image.mime_type};base64,{image_base64}",
                             "detail": "high"
                         },
                     },
@@ -74,12 +109,19 @@ class DocumentService:
             )
         ]
         response = self.llm.invoke(prompt)
+        summary_cache.put(IMAGE_SUMMARY_CACHE_NAMESPACE, cache_key, response.content)
         return response.content
 
-    def process_and_store_report(self, file_path: str, consultation_id: int) -> str:
+    def _store_embeddings(self, parsed: ParsedDocument, consultation_id: int, report_id: int):
+        """Upserts this report's chunks for the RAG agent."""
+        stored = self.vector_index.index_report(consultation_id, report_id, parsed.chunks)
+        print(f"Successfully stored {stored} text chunks of report {report_id} for consultation {consultation_id}")
+
+    def process_and_store_report(self, file_path: str, consultation_id: int, report_id: int) -> ProcessedReport:
         """
         Processes an uploaded report file based on its type, stores embeddings
         if it's a text file, and returns an AI-generated summary.
+        Text files are parsed exactly once; the pages feed both embedding and summary.
         """
         _, file_extension = os.path.splitext(file_path)
         file_ext_lower = file_extension.lower()
@@ -87,23 +129,81 @@ class DocumentService:
         if file_ext_lower in TEXT_EXTENSIONS:
             # For text files, we also create vector embeddings for the RAG agent
             print(f"Processing TEXT document for consultation {consultation_id}")
-            documents = PyPDFLoader(file_path).load() if file_ext_lower == '.pdf' else Docx2txtLoader(file_path).load()
-            chunks = self.text_splitter.split_documents(documents)
-            collection_name = f"consultation_{consultation_id}"
-            Qdrant.from_documents(
-                documents=chunks, embedding=self.embeddings,
-                host=settings.QDRANT_HOST, port=settings.QDRANT_PORT,
-                collection_name=collection_name, force_recreate=True,
+            parsed = self.parse_document(file_path)
+            self._store_embeddings(parsed, consultation_id, report_id)
+            return ProcessedReport(
+                summary=self._generate_summary_for_text(parsed),
+                parse_seconds=parsed.parse_seconds,
+                peak_memory_bytes=parsed.peak_memory_bytes
             )
-            print(f"Successfully stored text embeddings for consultation {consultation_id}")
-            # Now generate the summary
-            return self._generate_summary_for_text(file_path)
 
         elif file_ext_lower in IMAGE_EXTENSIONS:
             # For image files, we only generate a summary
             print(f"Processing IMAGE document for consultation {consultation_id}")
-            return self._generate_summary_for_image(file_path)
+            return ProcessedReport(summary=self._generate_summary_for_image(file_path))
 
         else:
             raise ValueError(f"Unsupported file type for processing: {file_extension}")
 
+    async def _summarize_batch(self, parsed_by_report: Dict[int, ParsedDocument],
+                               image_reports: List[Tuple[int, str]]) -> Dict[int, Union[str, Exception]]:
+        report_ids = list(parsed_by_report) + [report_id for report_id, _ in image_reports]
+        tasks = [self.summarizer.summarize(parsed.pages) for parsed in parsed_by_report.values()]
+        tasks += [asyncio.to_thread(self._generate_summary_for_image, file_path) for _, file_path in image_reports]
+        summaries = await asyncio.gather(*tasks, return_exceptions=True)
+        return dict(zip(report_ids, summaries))
+
+    def process_report_batch(self, consultation_id: int,
+                             reports: List[Tuple[int, str]]) -> Dict[int, Union[ProcessedReport, Exception]]:
+        """
+        Processes several uploaded reports of one consultation together: text files
+        are parsed in parallel on the parsing pool, all their chunks are embedded in
+        one batched call, and every summary is generated concurrently.
+        Returns a result (or the exception that stopped it) per report id.
+        """
+        results = {}
+        text_reports, image_reports = [], []
+        for report_id, file_path in reports:
+            file_ext_lower = os.path.splitext(file_path)[1].lower()
+            if file_ext_lower in TEXT_EXTENSIONS:
+                text_reports.append((report_id, file_path))
+            elif file_ext_lower in IMAGE_EXTENSIONS:
+                image_reports.append((report_id, file_path))
+            else:
+                results[report_id] = ValueError(f"Unsupported file type for processing: {file_ext_lower}")
+
+        parsed_by_report = {}
+        parsed_files = self.parsing_service.parse_many([file_path for _, file_path in text_reports])
+        for (report_id, _), parsed in zip(text_reports, parsed_files):
+            if isinstance(parsed, Exception):
+                results[report_id] = parsed
+            else:
+                parsed_by_report[report_id] = parsed
+
+        if parsed_by_report:
+            chunks_by_report = {
+                report_id: parsed.chunks
+                for report_id, parsed in parsed_by_report.items()
+            }
+            try:
+                stored = self.vector_index.index_reports(consultation_id, chunks_by_report)
+                print(f"Successfully stored {stored} text chunks of {len(chunks_by_report)} reports for consultation {consultation_id}")
+            except Exception as e:
+                for report_id in parsed_by_report:
+                    results[report_id] = e
+                parsed_by_report = {}
+
+        summaries = run_sync(self._summarize_batch(parsed_by_report, image_reports))
+        for report_id, summary in summaries.items():
+            if isinstance(summary, Exception):
+                results[report_id] = summary
+            elif report_id in parsed_by_report:
+                parsed = parsed_by_report[report_id]
+                results[report_id] = ProcessedReport(
+                    summary=summary,
+                    parse_seconds=parsed.parse_seconds,
+                    peak_memory_bytes=parsed.peak_memory_bytes
+                )
+            else:
+                results[report_id] = ProcessedReport(summary=summary)
+        return results
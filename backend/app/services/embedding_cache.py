@@ -0,0 +1,126 @@
+# backend/app/services/embedding_cache.py
+
+import asyncio
+import hashlib
+import time
+from array import array
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.services.sqlite_cache import SQLiteLRUCache, cache_path
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so trivially reformatted chunks share a cache entry."""
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(SQLiteLRUCache):
+    """
+    Persistent embedding cache keyed by (model name, normalized text hash).
+    Vectors are stored as float32 blobs in SQLite; the least recently used
+    entries are evicted once the cache grows past `max_entries`.
+    """
+
+    TABLE = "embeddings"
+    COLUMNS = "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL"
+    PRIMARY_KEY = "model, text_hash"
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Returns the cached vectors for the given hashes and refreshes their recency."""
+        if not hashes:
+            return {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for start in range(0, len(unique_hashes), 500):
+                batch = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for row_hash, blob in rows:
+                    found[row_hash] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+            hit_count = sum(1 for h in hashes if h in found)
+            self.hits += hit_count
+            self.misses += len(hashes) - hit_count
+        return found
+
+    def put_many(self, model: str, items: Dict[str, List[float]]):
+        """Stores vectors by hash, evicting the least recently used entries if needed."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(model, h, array("f", vector).tobytes(), now) for h, vector in items.items()],
+            )
+            self._added(len(items))
+            self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embeddings model and serves repeated texts from the embedding cache."""
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache, model_name: Optional[str] = None):
+        self.underlying = underlying
+        self.cache = cache
+        self.model_name = model_name or getattr(underlying, "model", type(underlying).__name__)
+
+    def _lookup(self, texts: List[str]):
+        hashes = [text_hash(text) for text in texts]
+        cached = self.cache.get_many(self.model_name, hashes)
+        missing = {}
+        for text, h in zip(texts, hashes):
+            if h not in cached and h not in missing:
+                missing[h] = text
+        return hashes, cached, missing
+
+    def _merge(self, hashes, cached, missing, new_vectors) -> List[List[float]]:
+        computed = dict(zip(missing.keys(), new_vectors))
+        self.cache.put_many(self.model_name, computed)
+        cached.update(computed)
+        return [cached[h] for h in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, cached, missing = self._lookup(texts)
+        new_vectors = self.underlying.embed_documents(list(missing.values())) if missing else []
+        return self._merge(hashes, cached, missing, new_vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # SQLite access runs in a worker thread so the event loop never blocks on disk.
+        hashes, cached, missing = await asyncio.to_thread(self._lookup, texts)
+        new_vectors = await self.underlying.aembed_documents(list(missing.values())) if missing else []
+        return await asyncio.to_thread(self._merge, hashes, cached, missing, new_vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+embedding_cache = EmbeddingCache(
+    path=cache_path(settings.EMBEDDING_CACHE_PATH),
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+)
+
+
+def with_embedding_cache(embeddings: Embeddings) -> CachedEmbeddings:
+    """Wraps an embeddings model with the process-wide embedding cache."""
+    return CachedEmbeddings(embeddings, embedding_cache)
@@ -0,0 +1,314 @@
+# backend/app/services/fake_backends.py
+#
+# Offline stand-ins for the OpenAI chat, embedding and Whisper APIs, selected
+# with LLM_BACKEND=fake. Outputs are deterministic (derived from a hash of the
+# input) and latency follows a fixed model of per-request and per-token costs,
+# so benchmarks and load tests measure the app's own overhead without network
+# access, API costs or noise.
+
+import asyncio
+import hashlib
+import io
+import json
+import random
+import re
+import time
+import wave
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from app.core.config import settings
+
+# Roughly what OpenAI tokenizers average on English text.
+CHARS_PER_TOKEN = 4
+# Assumed bitrate of compressed uploads (the scribe encodes speech at 24 kbit/s).
+COMPRESSED_AUDIO_BYTES_PER_SECOND = 3000
+SPOKEN_WORDS_PER_SECOND = 2.5
+
+VOCABULARY = (
+    "patient reports mild intermittent chest pain shortness of breath fatigue headache nausea fever cough "
+    "blood pressure heart rate normal elevated within limits history of hypertension diabetes asthma "
+    "prescribed amoxicillin twice daily follow up in two weeks recommend imaging laboratory tests referral "
+    "examination unremarkable tenderness noted lungs clear bilaterally no acute distress symptoms improved"
+).split()
+SOAP_SECTIONS = ("Subjective", "Objective", "Assessment", "Plan")
+
+
+def count_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _rng(*parts: str) -> random.Random:
+    digest = hashlib.sha256("\0".join(parts).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _words(rng: random.Random, tokens: int) -> str:
+    # About 1.3 tokens per word of English text.
+    return " ".join(rng.choice(VOCABULARY) for _ in range(max(1, int(tokens / 1.3))))
+
+
+class FakeEncoding:
+    """Offline tokenizer with the same interface ContextBuilder uses from tiktoken."""
+
+    def encode(self, text: str) -> List[str]:
+        return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+class _Limited:
+    """Holds the gateway's concurrency limits around a fake call, like the HTTP transport does for real ones."""
+
+    def __init__(self, limits):
+        self.limits = limits
+
+    def __enter__(self):
+        for limit in self.limits:
+            limit.acquire()
+
+    def __exit__(self, *exc):
+        for limit in reversed(self.limits):
+            limit.release()
+
+    async def __aenter__(self):
+        acquired = []
+        try:
+            for limit in self.limits:
+                await limit.aacquire()
+                acquired.append(limit)
+        except BaseException:
+            for limit in reversed(acquired):
+                limit.release()
+            raise
+
+    async def __aexit__(self, *exc):
+        for limit in reversed(self.limits):
+            limit.release()
+
+
+def _fake_value(name: str, annotation: Any, rng: random.Random, output_tokens: int):
+    if getattr(annotation, "__origin__", None) in (list, List):
+        return [_words(rng, 8) for _ in range(rng.randint(2, 4))]
+    if "soap" in name.lower():
+        return _soap_note(rng, output_tokens)
+    return _words(rng, output_tokens)
+
+
+def _schema_fields(schema) -> dict:
+    if hasattr(schema, "model_fields"):
+        return {name: field.annotation for name, field in schema.model_fields.items()}
+    return {name: field.outer_type_ for name, field in schema.__fields__.items()}
+
+
+def _soap_note(rng: random.Random, output_tokens: int) -> str:
+    per_section = max(1, output_tokens // len(SOAP_SECTIONS))
+    return "\n\n".join(f"**{section}:**\n{_words(rng, per_section)}" for section in SOAP_SECTIONS)
+
+
+def _react_step(prompt: str, rng: random.Random, output_tokens: int) -> str:
+    """ReAct agents get one tool call, then a final answer once they have an observation."""
+    scratchpad = prompt.rsplit("\nQuestion:", 1)[-1]
+    if "Observation:" in scratchpad:
+        return f" I now know the final answer\nFinal Answer: {_words(rng, output_tokens)}"
+    tool_names = re.search(r"should be one of \[([^\]]*)\]", prompt)
+    tools = [name.strip() for name in tool_names.group(1).split(",")] if tool_names else []
+    tool = "get_all_report_summaries" if "get_all_report_summaries" in tools else (tools[0] if tools else "none")
+    return f" I should look at the consultation data.\nAction: {tool}\nAction Input: all reports"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model. Latency is `latency_seconds` plus a cost per
+    prompt and per completion token; responses are streamed token by token.
+    Token usage is reported like OpenAI's, so usage callbacks keep working.
+    Supports `with_structured_output` and ReAct agents.
+    """
+
+    model_name: str = "fake-chat"
+    temperature: Optional[float] = None
+    latency_seconds: float = settings.FAKE_LLM_LATENCY_SECONDS
+    seconds_per_input_token: float = settings.FAKE_LLM_SECONDS_PER_INPUT_TOKEN
+    seconds_per_output_token: float = settings.FAKE_LLM_SECONDS_PER_OUTPUT_TOKEN
+    output_tokens: int = settings.FAKE_LLM_OUTPUT_TOKENS
+    limits: list = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def get_num_tokens(self, text: str) -> int:
+        return count_tokens(text)
+
+    def _respond(self, messages: List[BaseMessage], schema=None) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        rng = _rng(self.model_name, prompt)
+        if schema is not None:
+            values = {
+                name: _fake_value(name, annotation, rng, self.output_tokens)
+                for name, annotation in _schema_fields(schema).items()
+            }
+            return json.dumps(values)
+        if "Action Input:" in prompt and "Final Answer:" in prompt:
+            return _react_step(prompt, rng, self.output_tokens)
+        if "SOAP" in prompt:
+            return _soap_note(rng, self.output_tokens)
+        return _words(rng, self.output_tokens)
+
+    def _result(self, messages: List[BaseMessage], text: str) -> ChatResult:
+        prompt_tokens = sum(count_tokens(str(message.content)) for message in messages)
+        completion_tokens = count_tokens(text)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={
+                "token_usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+                "model_name": self.model_name,
+            },
+        )
+
+    def _first_token_delay(self, messages: List[BaseMessage]) -> float:
+        return self.latency_seconds + self.seconds_per_input_token * sum(
+            count_tokens(str(message.content)) for message in messages
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs) -> ChatResult:
+        text = self._respond(messages, kwargs.get("fake_schema"))
+        with _Limited(self.limits):
+            time.sleep(self._first_token_delay(messages) + self.seconds_per_output_token * count_tokens(text))
+        return self._result(messages, text)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs) -> ChatResult:
+        text = self._respond(messages, kwargs.get("fake_schema"))
+        async with _Limited(self.limits):
+            await asyncio.sleep(self._first_token_delay(messages) + self.seconds_per_output_token * count_tokens(text))
+        return self._result(messages, text)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        text = self._respond(messages, kwargs.get("fake_schema"))
+        with _Limited(self.limits):
+            time.sleep(self._first_token_delay(messages))
+            for token in FakeEncoding().encode(text):
+                time.sleep(self.seconds_per_output_token)
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._respond(messages, kwargs.get("fake_schema"))
+        async with _Limited(self.limits):
+            await asyncio.sleep(self._first_token_delay(messages))
+            for token in FakeEncoding().encode(text):
+                await asyncio.sleep(self.seconds_per_output_token)
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    await run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+
+    def with_structured_output(self, schema, **kwargs):
+        """Returns instances of `schema` filled with deterministic values."""
+        return self.bind(fake_schema=schema) | RunnableLambda(lambda message: schema(**json.loads(message.content)))
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic embeddings: hashed bag of words, so texts sharing words are
+    similar. Each call costs `latency_seconds` plus a cost per input token.
+    """
+
+    def __init__(self, model: str = "fake-embedding", dimensions: int = settings.FAKE_EMBEDDING_DIMENSIONS,
+                 latency_seconds: float = settings.FAKE_EMBEDDING_LATENCY_SECONDS,
+                 seconds_per_token: float = settings.FAKE_EMBEDDING_SECONDS_PER_TOKEN, limits=()):
+        self.model = model
+        self.dimensions = dimensions
+        self.latency_seconds = latency_seconds
+        self.seconds_per_token = seconds_per_token
+        self.limits = list(limits)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()) or [""]:
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "big") % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def _delay(self, texts: List[str]) -> float:
+        return self.latency_seconds + self.seconds_per_token * sum(count_tokens(text) for text in texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with _Limited(self.limits):
+            time.sleep(self._delay(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        async with _Limited(self.limits):
+            await asyncio.sleep(self._delay(texts))
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+def _audio_seconds(audio_bytes: bytes) -> float:
+    if audio_bytes[:4] == b"RIFF":
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            return wav.getnframes() / wav.getframerate()
+    return len(audio_bytes) / COMPRESSED_AUDIO_BYTES_PER_SECOND
+
+
+class _FakeTranscription:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeTranscriptions:
+    def __init__(self, latency_seconds: float, seconds_per_audio_second: float, limits):
+        self.latency_seconds = latency_seconds
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.limits = limits
+
+    async def create(self, model: str, file, **kwargs) -> _FakeTranscription:
+        filename, audio_bytes = file
+        seconds = _audio_seconds(audio_bytes)
+        async with _Limited(self.limits):
+            await asyncio.sleep(self.latency_seconds + self.seconds_per_audio_second * seconds)
+        rng = _rng(model, hashlib.sha256(audio_bytes).hexdigest())
+        words = max(1, int(seconds * SPOKEN_WORDS_PER_SECOND))
+        return _FakeTranscription(" ".join(rng.choice(VOCABULARY) for _ in range(words)))
+
+
+class _FakeAudio:
+    def __init__(self, transcriptions: _FakeTranscriptions):
+        self.transcriptions = transcriptions
+
+
+class FakeOpenAIClient:
+    """
+    Stands in for `AsyncOpenAI` where the app uses it directly (Whisper).
+    Transcription takes `latency_seconds` plus a cost per second of audio and
+    returns words at a normal speaking rate.
+    """
+
+    def __init__(self, latency_seconds: float = settings.FAKE_WHISPER_LATENCY_SECONDS,
+                 seconds_per_audio_second: float = settings.FAKE_WHISPER_SECONDS_PER_AUDIO_SECOND, limits=()):
+        self.audio = _FakeAudio(_FakeTranscriptions(latency_seconds, seconds_per_audio_second, list(limits)))
@@ -0,0 +1,89 @@
+# backend/app/services/image_preprocessing.py
+
+import hashlib
+import io
+import os
+from dataclasses import dataclass
+from PIL import Image, ImageOps
+
+# The vision model fits "high" detail images within 2048x2048 and then scales the
+# shortest side to 768px, so anything larger is wasted upload and memory.
+MAX_LONG_SIDE = 2048
+MAX_SHORT_SIDE = 768
+JPEG_QUALITY = 85
+# Formats the vision model accepts as-is.
+PASSTHROUGH_FORMATS = ("JPEG", "PNG", "WEBP")
+EXIF_ORIENTATION_TAG = 0x0112
+
+
+@dataclass
+class PreparedImage:
+    """An image downscaled and re-encoded for the vision model."""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_size_bytes: int
+    content_hash: str
+
+
+def _target_size(width: int, height: int) -> tuple:
+    scale = min(1.0, MAX_LONG_SIDE / max(width, height))
+    scale = min(scale, MAX_SHORT_SIDE / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def content_hash(data: bytes) -> str:
+    """Exact hash of the bytes sent to the vision model; the identity of an image summary."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def prepare_image(file_path: str) -> PreparedImage:
+    """
+    Downscales an image to the resolution the vision model actually uses and
+    re-encodes it: JPEG for opaque images, PNG when there is transparency.
+    Small images in a supported format are passed through unchanged.
+    """
+    original_size_bytes = os.path.getsize(file_path)
+    with Image.open(file_path) as image:
+        source_format = image.format
+        upright = image.getexif().get(EXIF_ORIENTATION_TAG, 1) == 1
+        if source_format in PASSTHROUGH_FORMATS and upright and _target_size(*image.size) == image.size:
+            # Already small enough: send the original bytes rather than re-encoding.
+            image.load()
+            with open(file_path, "rb") as image_file:
+                data = image_file.read()
+            return PreparedImage(
+                data=data,
+                mime_type=Image.MIME[source_format],
+                width=image.width,
+                height=image.height,
+                original_size_bytes=original_size_bytes,
+                content_hash=content_hash(data),
+            )
+
+        # Lets the JPEG decoder skip full-resolution decoding when shrinking a lot.
+        image.draft("RGB", _target_size(*image.size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(_target_size(*image.size), Image.Resampling.LANCZOS)
+
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        buffer = io.BytesIO()
+        if has_alpha:
+            image.save(buffer, format="PNG", optimize=True)
+            mime_type = "image/png"
+        else:
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            mime_type = "image/jpeg"
+
+        data = buffer.getvalue()
+        return PreparedImage(
+            data=data,
+            mime_type=mime_type,
+            width=image.width,
+            height=image.height,
+            original_size_bytes=original_size_bytes,
+            content_hash=content_hash(data),
+        )
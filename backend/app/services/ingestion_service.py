@@ -0,0 +1,165 @@
+# backend/app/services/ingestion_service.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Union
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.vector_db import get_qdrant_client
+from app.models.consultation import MedicalReport
+from app.models.job import IngestionJob, JobStatus
+from app.services.document_service import DocumentService, ProcessedReport
+from app.services.rollup_service import consultation_rollup
+
+FAILED_SUMMARY_TEXT = "AI summary could not be generated for this document."
+
+
+class IngestionQueue:
+    """
+    Runs report processing (parsing, embedding, summarizing) on a bounded
+    worker pool so upload requests can return as soon as the file is saved.
+    Job state is kept in the `ingestion_jobs` table so any API worker can report it.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self._document_service = None
+        self._lock = threading.Lock()
+
+    def _get_document_service(self) -> DocumentService:
+        # Shared by all workers; built lazily so importing this module stays cheap.
+        with self._lock:
+            if self._document_service is None:
+                self._document_service = DocumentService(get_qdrant_client())
+            return self._document_service
+
+    def submit(self, job_id: int) -> None:
+        """Schedules a persisted job for processing."""
+        self._executor.submit(self._run, job_id)
+
+    def submit_batch(self, job_ids: List[int]) -> None:
+        """Schedules several jobs of one consultation to be processed together."""
+        self._executor.submit(self._run_batch, job_ids)
+
+    def requeue_interrupted_jobs(self) -> int:
+        """
+        Queues again the jobs a stopped process left PENDING or RUNNING; they only
+        lived in that process's pool. Each job is claimed with a conditional update
+        so that when several API workers start together only one of them re-queues it.
+        """
+        db = SessionLocal()
+        try:
+            stale = db.query(IngestionJob.id, IngestionJob.started_at).filter(
+                IngestionJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING])
+            ).all()
+            claimed = []
+            for job_id, started_at in stale:
+                previous = IngestionJob.started_at.is_(None) if started_at is None else IngestionJob.started_at == started_at
+                updated = db.query(IngestionJob).filter(
+                    IngestionJob.id == job_id,
+                    IngestionJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+                    previous
+                ).update(
+                    {IngestionJob.status: JobStatus.PENDING, IngestionJob.started_at: datetime.now(timezone.utc)},
+                    synchronize_session=False
+                )
+                db.commit()
+                if updated:
+                    claimed.append(job_id)
+        except Exception as e:
+            print(f"ERROR: Interrupted ingestion jobs could not be re-queued. Error: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+        for job_id in claimed:
+            self.submit(job_id)
+        if claimed:
+            print(f"INFO: Re-queued {len(claimed)} interrupted ingestion job(s).")
+        return len(claimed)
+
+    def _start_jobs(self, db, job_ids: List[int]):
+        jobs = db.query(IngestionJob).filter(IngestionJob.id.in_(job_ids)).all()
+        reports = {
+            report.id: report
+            for report in db.query(MedicalReport).filter(MedicalReport.id.in_([job.report_id for job in jobs])).all()
+        }
+        started_at = datetime.now(timezone.utc)
+        for job in jobs:
+            job.status = JobStatus.RUNNING
+            job.started_at = started_at
+        db.commit()
+        return jobs, reports
+
+    def _finish_job(self, job: IngestionJob, report: MedicalReport, result: Union[ProcessedReport, Exception]):
+        if isinstance(result, Exception):
+            print(f"ERROR: AI processing failed for file {report.file_path}. Error: {result}")
+            report.summary = FAILED_SUMMARY_TEXT
+            job.status = JobStatus.FAILED
+            job.error = str(result)
+        else:
+            report.summary = result.summary
+            job.parse_seconds = result.parse_seconds
+            job.parse_peak_memory_bytes = result.peak_memory_bytes
+            job.status = JobStatus.DONE
+        job.finished_at = datetime.now(timezone.utc)
+
+    def _run(self, job_id: int) -> None:
+        db = SessionLocal()
+        try:
+            jobs, reports = self._start_jobs(db, [job_id])
+            if not jobs:
+                print(f"ERROR: Ingestion job {job_id} not found.")
+                return
+            job = jobs[0]
+            report = reports[job.report_id]
+            try:
+                result = self._get_document_service().process_and_store_report(
+                    file_path=report.file_path,
+                    consultation_id=job.consultation_id,
+                    report_id=report.id
+                )
+            except Exception as e:
+                result = e
+            self._finish_job(job, report, result)
+            db.commit()
+            consultation_rollup.schedule_refresh(job.consultation_id)
+        except Exception as e:
+            print(f"ERROR: Ingestion job {job_id} could not be updated. Error: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _run_batch(self, job_ids: List[int]) -> None:
+        db = SessionLocal()
+        try:
+            jobs, reports = self._start_jobs(db, job_ids)
+            if not jobs:
+                return
+            try:
+                results = self._get_document_service().process_report_batch(
+                    consultation_id=jobs[0].consultation_id,
+                    reports=[(job.report_id, reports[job.report_id].file_path) for job in jobs]
+                )
+            except Exception as e:
+                results = {job.report_id: e for job in jobs}
+            for job in jobs:
+                self._finish_job(job, reports[job.report_id], results[job.report_id])
+            db.commit()
+            # One rollup merge for the whole batch.
+            consultation_rollup.schedule_refresh(jobs[0].consultation_id)
+        except Exception as e:
+            print(f"ERROR: Ingestion jobs {job_ids} could not be updated. Error: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+ingestion_queue = IngestionQueue(max_workers=settings.INGESTION_MAX_WORKERS)
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    """Returns the process-wide ingestion queue."""
+    return ingestion_queue
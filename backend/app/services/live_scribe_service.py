@@ -0,0 +1,133 @@
+# backend/app/services/live_scribe_service.py
+
+import asyncio
+import os
+import tempfile
+from typing import Awaitable, Callable, Optional
+
+from app.agents.nodes.scribe_nodes import ScribeNodes, update_transcript_summary
+from app.core.config import settings
+from app.services.transcription_service import (
+    BYTES_PER_SECOND, decode_to_pcm, merge_transcripts, transcription_service
+)
+
+scribe_nodes = ScribeNodes()
+
+
+def _append_file(path: str, data: bytes):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class LiveScribeSession:
+    """
+    Builds a SOAP note while a consultation is being recorded. Audio chunks are
+    appended to one growing file (browser recorders only put the container
+    header in the first chunk); every so often the audio that has not been
+    transcribed yet is decoded, transcribed and folded into a running
+    TranscriptSummary. When the recording stops only the last stretch is left
+    to transcribe before the note is written.
+    """
+
+    def __init__(self, consultation_id: int, update_seconds: int, min_chunk_seconds: int, overlap_seconds: int):
+        self.consultation_id = consultation_id
+        self.update_seconds = update_seconds
+        self.min_chunk_seconds = min_chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.transcript = ""
+        self.summary: Optional[dict] = None
+        self.transcribed_seconds = 0.0
+        fd, self.audio_path = tempfile.mkstemp(prefix="live_scribe_", suffix=".webm")
+        os.close(fd)
+        self._update_lock = asyncio.Lock()
+        self._stopped = asyncio.Event()
+
+    async def add_audio(self, chunk: bytes):
+        await asyncio.to_thread(_append_file, self.audio_path, chunk)
+
+    async def update(self, final: bool = False) -> Optional[dict]:
+        """
+        Transcribes the audio received since the last update (plus a little
+        overlap) and updates the running summary. Returns an update event, or
+        None if there was not enough new audio yet.
+        """
+        async with self._update_lock:
+            start = max(0.0, self.transcribed_seconds - self.overlap_seconds)
+            try:
+                pcm = await decode_to_pcm(self.audio_path, start)
+            except (RuntimeError, FileNotFoundError) as e:
+                # The file may end mid-frame while chunks are still arriving; try again next time.
+                # FileNotFoundError means ffmpeg itself is missing, which the final update reports.
+                if final:
+                    raise
+                print(f"Live scribe for consultation {self.consultation_id}: skipping update. Error: {e}")
+                return None
+
+            end = start + len(pcm) / BYTES_PER_SECOND
+            new_seconds = end - self.transcribed_seconds
+            if new_seconds <= 0 or (not final and new_seconds < self.min_chunk_seconds):
+                return None
+
+            transcript_delta = await transcription_service.transcribe_pcm(pcm)
+            self.transcript = merge_transcripts([self.transcript, transcript_delta])
+            if transcript_delta.strip():
+                self.summary = await update_transcript_summary(self.summary, transcript_delta)
+            self.transcribed_seconds = end
+            return {
+                "type": "update",
+                "transcribed_seconds": round(end, 1),
+                "transcript_delta": transcript_delta,
+                "summary": self.summary,
+            }
+
+    async def run_periodic_updates(self, send: Callable[[dict], Awaitable[None]]):
+        """Runs `update` every `update_seconds` until `stop` is called, sending each update."""
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=self.update_seconds)
+                break
+            except asyncio.TimeoutError:
+                pass
+            try:
+                event = await self.update()
+                if event is not None:
+                    await send(event)
+            except Exception as e:
+                print(f"Live scribe update failed for consultation {self.consultation_id}. Error: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+    async def finish(self) -> dict:
+        """Transcribes the remaining audio, then writes and saves the SOAP note. Returns the final state."""
+        try:
+            await self.update(final=True)
+            if not self.summary:
+                return {"error": "No speech was transcribed."}
+            state = {
+                "consultation_id": self.consultation_id,
+                "audio_file_path": self.audio_path,
+                "transcription": self.transcript,
+                "structured_summary": self.summary,
+            }
+            state.update(await scribe_nodes.generate_soap_note(state))
+            if state.get("error"):
+                return state
+            state.update(await scribe_nodes.save_note(state))
+            return state
+        finally:
+            await asyncio.to_thread(_remove_file, self.audio_path)
+
+
+def create_live_scribe_session(consultation_id: int) -> LiveScribeSession:
+    return LiveScribeSession(
+        consultation_id=consultation_id,
+        update_seconds=settings.SCRIBE_LIVE_UPDATE_SECONDS,
+        min_chunk_seconds=settings.SCRIBE_LIVE_MIN_CHUNK_SECONDS,
+        overlap_seconds=settings.SCRIBE_SEGMENT_OVERLAP_SECONDS,
+    )
@@ -0,0 +1,347 @@
+# backend/app/services/llm_gateway.py
+
+import asyncio
+import threading
+import weakref
+from collections import deque
+from typing import Dict, Optional
+import httpx
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+
+LLM_BACKENDS = ("openai", "fake")
+
+# Pipeline stages whose model can be chosen in config (LLM_STAGE_MODELS).
+STAGES = (
+    "scribe_structure",  # transcript -> structured fields (also the live scribe updates)
+    "scribe_note",       # structured fields -> SOAP note, and the single-pass mode
+    "ddx",
+    "summary_map",       # per-page summaries of text reports
+    "summary_reduce",    # combining page summaries into one report summary
+    "image_summary",
+    "rollup",
+    "rag",
+    "agent",
+)
+
+
+def parse_mapping(value: str) -> Dict[str, str]:
+    """Parses "key=value,key=value" config values."""
+    mapping = {}
+    for item in (value or "").split(","):
+        if item.strip():
+            key, _, item_value = item.partition("=")
+            mapping[key.strip()] = item_value.strip()
+    return mapping
+
+
+class ConcurrencyLimit:
+    """
+    A counting semaphore usable from threads and from any event loop. The app
+    calls models from the API loop, the background loop and worker threads, so
+    an asyncio.Semaphore (bound to one loop) cannot enforce a process-wide limit.
+    Waiters are served first come, first served.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._lock = threading.Lock()
+        self._waiters = deque()  # threading.Event or (loop, future)
+
+    def acquire(self):
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        # The releasing side hands its slot over, so in_use is not touched here.
+        event.wait()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was already handed to us; pass it on.
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def _wake(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self.in_use -= 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            loop.call_soon_threadsafe(self._wake, future)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _ReleasingAsyncStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _once(function):
+    done = []
+
+    def wrapper():
+        if not done:
+            done.append(True)
+            function()
+    return wrapper
+
+
+class _LimitedTransport(httpx.BaseTransport):
+    """Holds the model's and the global slot from sending a request until its response is closed."""
+
+    def __init__(self, pool: httpx.BaseTransport, limits):
+        self._pool = pool
+        self._limits = limits
+
+    def _release_all(self):
+        for limit in reversed(self._limits):
+            limit.release()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        acquired = []
+        try:
+            for limit in self._limits:
+                limit.acquire()
+                acquired.append(limit)
+            response = self._pool.handle_request(request)
+        except BaseException:
+            for limit in reversed(acquired):
+                limit.release()
+            raise
+        return httpx.Response(
+            response.status_code, headers=response.headers, extensions=response.extensions,
+            stream=_ReleasingStream(response.stream, _once(self._release_all)),
+        )
+
+
+class _LimitedAsyncTransport(httpx.AsyncBaseTransport):
+    """Async variant; connections are pooled per event loop, since they cannot move between loops."""
+
+    def __init__(self, pools, limits):
+        self._pools = pools
+        self._limits = limits
+
+    def _release_all(self):
+        for limit in reversed(self._limits):
+            limit.release()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        acquired = []
+        try:
+            for limit in self._limits:
+                await limit.aacquire()
+                acquired.append(limit)
+            response = await self._pools.get().handle_async_request(request)
+        except BaseException:
+            for limit in reversed(acquired):
+                limit.release()
+            raise
+        return httpx.Response(
+            response.status_code, headers=response.headers, extensions=response.extensions,
+            stream=_ReleasingAsyncStream(response.stream, _once(self._release_all)),
+        )
+
+
+class _AsyncPools:
+    def __init__(self, limits: httpx.Limits):
+        self._limits = limits
+        self._pools = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._pools.get(loop)
+            if pool is None:
+                pool = self._pools[loop] = httpx.AsyncHTTPTransport(limits=self._limits)
+            return pool
+
+
+class LLMGateway:
+    """
+    The one place OpenAI clients are created. Every model shares one HTTP
+    connection pool (kept alive between requests), requests are capped by a
+    global and a per-model concurrency limit, and all clients use the same
+    timeout and retry policy. Which model serves each pipeline stage is set in
+    config, so latency can be traded against quality without code changes.
+    Clients are created once per model and settings and then reused.
+
+    With the "fake" backend the same methods return offline stand-ins (see
+    fake_backends), still subject to the concurrency limits.
+    """
+
+    def __init__(self, backend: str, api_key: Optional[str], default_model: str, stage_models: Dict[str, str],
+                 max_concurrency: int, model_max_concurrency: int, model_concurrency: Dict[str, int],
+                 timeout_seconds: float, max_retries: int, max_connections: int, max_keepalive_connections: int):
+        if backend not in LLM_BACKENDS:
+            raise ValueError(f"Unknown LLM backend '{backend}'. Use one of: {', '.join(LLM_BACKENDS)}.")
+        unknown = set(stage_models) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown LLM stage(s) in config: {', '.join(sorted(unknown))}. Use: {', '.join(STAGES)}.")
+        self.backend = backend
+        self.api_key = api_key
+        self.default_model = default_model
+        self.stage_models = stage_models
+        self.model_max_concurrency = model_max_concurrency
+        self.model_concurrency = model_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self._global_limit = ConcurrencyLimit(max_concurrency)
+        self._model_limits = {}
+        http_limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self._sync_pool = httpx.HTTPTransport(limits=http_limits)
+        self._async_pools = _AsyncPools(http_limits)
+        self._http_clients = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, stage: str) -> str:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown LLM stage '{stage}'.")
+        return self.stage_models.get(stage) or self.default_model
+
+    def _limits_for(self, model: str):
+        """
+        The limits a request to `model` takes, in order. The model's comes first:
+        a request queued behind a busy model must not hold a global slot that
+        requests to other models could use.
+        """
+        if model not in self._model_limits:
+            self._model_limits[model] = ConcurrencyLimit(self.model_concurrency.get(model, self.model_max_concurrency))
+        return [self._model_limits[model], self._global_limit]
+
+    def _http_clients_for(self, model: str):
+        """Sync and async httpx clients whose requests count against `model`'s limit. Call with the lock held."""
+        if model not in self._http_clients:
+            limits = self._limits_for(model)
+            self._http_clients[model] = (
+                httpx.Client(transport=_LimitedTransport(self._sync_pool, limits)),
+                httpx.AsyncClient(transport=_LimitedAsyncTransport(self._async_pools, limits)),
+            )
+        return self._http_clients[model]
+
+    def _client(self, kind: str, model: str, **kwargs):
+        """The `kind` of client for `model`, created on first use and then shared."""
+        key = (kind, model, tuple(sorted(kwargs.items())))
+        with self._lock:
+            if key not in self._clients:
+                create = self._create_fake if self.backend == "fake" else self._create_openai
+                self._clients[key] = create(kind, model, kwargs)
+            return self._clients[key]
+
+    def _create_openai(self, kind: str, model: str, kwargs: dict):
+        http_client, http_async_client = self._http_clients_for(model)
+        options = {"api_key": self.api_key, "timeout": self.timeout_seconds, "max_retries": self.max_retries}
+        if kind == "chat":
+            return ChatOpenAI(
+                model=model, http_client=http_client, http_async_client=http_async_client, **options, **kwargs
+            )
+        if kind == "embeddings":
+            return OpenAIEmbeddings(model=model, http_client=http_client, http_async_client=http_async_client, **options)
+        return AsyncOpenAI(http_client=http_async_client, **options)
+
+    def _create_fake(self, kind: str, model: str, kwargs: dict):
+        # Imported here so the fakes are only ever loaded with LLM_BACKEND=fake.
+        from app.services import fake_backends
+        limits = self._limits_for(model)
+        # Prefixed names keep fake output from being taken for a real model's.
+        if kind == "chat":
+            return fake_backends.FakeChatModel(model_name=f"fake-{model}", limits=limits, **kwargs)
+        if kind == "embeddings":
+            return fake_backends.FakeEmbeddings(model=f"fake-{model}", limits=limits)
+        return fake_backends.FakeOpenAIClient(limits=limits)
+
+    def chat(self, stage: str, **kwargs) -> ChatOpenAI:
+        """The chat model for a pipeline stage. Extra arguments (e.g. temperature) are passed to ChatOpenAI."""
+        return self._client("chat", self.model_for(stage), **kwargs)
+
+    def embeddings(self) -> OpenAIEmbeddings:
+        return self._client("embeddings", settings.EMBEDDING_MODEL)
+
+    def openai_client(self, model: str) -> AsyncOpenAI:
+        """A raw async OpenAI client (e.g. for Whisper) whose requests count against `model`'s limit."""
+        return self._client("openai", model)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "in_flight": self._global_limit.in_use,
+                "max_concurrency": self._global_limit.limit,
+                "models": {
+                    model: {"in_flight": limit.in_use, "max_concurrency": limit.limit}
+                    for model, limit in self._model_limits.items()
+                },
+                "stage_models": {stage: self.model_for(stage) for stage in STAGES},
+            }
+
+
+llm_gateway = LLMGateway(
+    backend=settings.LLM_BACKEND,
+    api_key=settings.OPENAI_API_KEY,
+    default_model=settings.LLM_DEFAULT_MODEL,
+    stage_models=parse_mapping(settings.LLM_STAGE_MODELS),
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    model_max_concurrency=settings.LLM_MODEL_MAX_CONCURRENCY,
+    model_concurrency={model: int(limit) for model, limit in parse_mapping(settings.LLM_MODEL_CONCURRENCY).items()},
+    timeout_seconds=settings.LLM_TIMEOUT_SECONDS,
+    max_retries=settings.LLM_MAX_RETRIES,
+    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+)
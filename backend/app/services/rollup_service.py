@@ -0,0 +1,168 @@
+# backend/app/services/rollup_service.py
+
+import hashlib
+import json
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.consultation import Consultation, MedicalReport
+from app.services.llm_gateway import llm_gateway
+
+ROLLUP_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You maintain a concise running clinical summary of one consultation, combining the SOAP note from the "
+     "consultation audio and the summaries of all uploaded medical reports. Merge the new information into the "
+     "current summary: keep existing facts unless the new information supersedes them, cite report file names "
+     "for findings, and do not invent anything. Keep the whole summary under {max_words} words."),
+    ("human", "Current summary:\n{rollup}\n\nNew information:\n{delta}")
+])
+
+# Optimistic updates are retried this many times if another writer got there first.
+MAX_REFRESH_ATTEMPTS = 3
+
+
+def soap_note_hash(soap_note: Optional[str]) -> Optional[str]:
+    """How `rollup_sources` records which SOAP note was merged in."""
+    return hashlib.sha256(soap_note.encode("utf-8")).hexdigest() if soap_note else None
+
+
+def rollup_is_current(consultation: Consultation, report_ids: Set[int]) -> bool:
+    """
+    Whether the stored rollup already covers the consultation's SOAP note and
+    exactly these (summarized) reports.
+    """
+    if not consultation.rollup_summary:
+        return False
+    sources = json.loads(consultation.rollup_sources or "{}")
+    return (set(sources.get("report_ids", [])) == report_ids
+            and sources.get("soap_note") == soap_note_hash(consultation.soap_note))
+
+
+class ConsultationRollupService:
+    """
+    Maintains one compact summary per consultation (`Consultation.rollup_summary`)
+    so agents and the DDx read a single precomputed document instead of every
+    report summary. `rollup_sources` records what has been merged in; a refresh
+    only merges the delta (new reports, a changed SOAP note). Writes use
+    `rollup_version` as an optimistic lock, so concurrent refreshes from
+    different processes never lose an update.
+    """
+
+    def __init__(self, llm, max_words: int, merge_batch_size: int):
+        self.llm = llm
+        self.max_words = max_words
+        self.merge_batch_size = merge_batch_size
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rollup")
+        # Serializes refreshes of one consultation within this process.
+        self._locks = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def _merge(self, rollup: Optional[str], delta: str) -> str:
+        chain = ROLLUP_PROMPT | self.llm
+        response = chain.invoke({
+            "rollup": rollup or "(empty)",
+            "delta": delta,
+            "max_words": self.max_words,
+        })
+        return response.content
+
+    def _merge_all(self, rollup: Optional[str], soap_note: Optional[str], reports: List[MedicalReport]) -> str:
+        deltas = []
+        if soap_note is not None:
+            deltas.append(f"Updated SOAP note from the consultation audio (replaces any earlier SOAP note):\n{soap_note}")
+        for report in reports:
+            deltas.append(f"New report: {report.file_path.split('/')[-1]}\nSummary: {report.summary}")
+        # Merge in batches so one call never carries dozens of reports.
+        for start in range(0, len(deltas), self.merge_batch_size):
+            rollup = self._merge(rollup, "\n\n".join(deltas[start:start + self.merge_batch_size]))
+        return rollup
+
+    def _refresh_once(self, consultation_id: int):
+        """One optimistic refresh. Returns (rollup, written); written is False if another writer won."""
+        db = SessionLocal()
+        try:
+            consultation = db.query(Consultation).filter(Consultation.id == consultation_id).first()
+            if not consultation:
+                return None, True
+            sources = json.loads(consultation.rollup_sources or "{}")
+            merged_ids = set(sources.get("report_ids", []))
+            merged_soap = sources.get("soap_note")
+            rollup = consultation.rollup_summary
+
+            # Only ids are read to find the delta; full rows are loaded for new reports only.
+            current_ids = {
+                row.id for row in db.query(MedicalReport.id).filter(
+                    MedicalReport.consultation_id == consultation_id, MedicalReport.summary.isnot(None)
+                )
+            }
+            if not merged_ids <= current_ids:
+                # A merged report is gone; rebuild from scratch rather than carry stale findings.
+                rollup, merged_ids, merged_soap = None, set(), None
+            soap_hash = soap_note_hash(consultation.soap_note)
+            new_ids = sorted(current_ids - merged_ids)
+            if not new_ids and soap_hash == merged_soap:
+                return rollup, True
+
+            new_reports = (
+                db.query(MedicalReport).filter(MedicalReport.id.in_(new_ids)).order_by(MedicalReport.id).all()
+                if new_ids else []
+            )
+            updated = self._merge_all(
+                rollup, consultation.soap_note if soap_hash != merged_soap else None, new_reports
+            )
+            version = consultation.rollup_version
+            version_matches = (
+                Consultation.rollup_version.is_(None) if version is None else Consultation.rollup_version == version
+            )
+            written = db.query(Consultation).filter(Consultation.id == consultation_id, version_matches).update({
+                Consultation.rollup_summary: updated,
+                Consultation.rollup_sources: json.dumps({"report_ids": sorted(merged_ids | set(new_ids)), "soap_note": soap_hash}),
+                Consultation.rollup_version: (version or 0) + 1,
+            }, synchronize_session=False)
+            db.commit()
+            print(f"Rollup for consultation {consultation_id}: merged {len(new_ids)} report(s)"
+                  f"{' and the SOAP note' if soap_hash != merged_soap else ''}")
+            return updated, bool(written)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_rollup(self, consultation_id: int) -> Optional[str]:
+        """
+        Returns the consultation's rollup, merging in anything not yet included
+        first. None if there is nothing to summarize yet.
+        """
+        with self._locks_lock:
+            lock = self._locks[consultation_id]
+        with lock:
+            rollup = None
+            for _ in range(MAX_REFRESH_ATTEMPTS):
+                rollup, written = self._refresh_once(consultation_id)
+                if written:
+                    break
+                print(f"Rollup for consultation {consultation_id} changed concurrently; retrying.")
+            return rollup
+
+    def _refresh_quietly(self, consultation_id: int):
+        try:
+            self.get_rollup(consultation_id)
+        except Exception as e:
+            print(f"ERROR: Rollup refresh failed for consultation {consultation_id}. Error: {e}")
+
+    def schedule_refresh(self, consultation_id: int) -> None:
+        """Merges new data into the rollup in the background (after an upload or a new SOAP note)."""
+        self._executor.submit(self._refresh_quietly, consultation_id)
+
+
+consultation_rollup = ConsultationRollupService(
+    llm=llm_gateway.chat("rollup", temperature=0),
+    max_words=settings.ROLLUP_MAX_WORDS,
+    merge_batch_size=settings.ROLLUP_MERGE_BATCH_SIZE,
+)
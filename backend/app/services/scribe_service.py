@@ -0,0 +1,125 @@
+# backend/app/services/scribe_service.py
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import select, update
+
+from app.agents.graph_builder import new_run_id, resume_graph, run_graph
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.job import ScribeJob, JobStatus
+
+INTERRUPTED_JOB_ERROR = "Interrupted by a server restart; resume the graph run with the job's run_id."
+
+
+class ScribeService:
+    """
+    Runs the Scribe graph on the event loop, either inline or as a background
+    job that clients poll. Background runs are capped at `max_concurrent_jobs`.
+    """
+
+    def __init__(self, max_concurrent_jobs: int):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self._semaphore = None
+        # Keeps background tasks referenced until they finish.
+        self._tasks = set()
+
+    async def run(
+            self, consultation_id: int, audio_file_path: str, mode: Optional[str] = None, run_id: Optional[str] = None
+    ) -> dict:
+        """
+        Runs the Scribe graph to completion and removes the audio file afterwards.
+        `mode` is one of SCRIBE_MODES; None uses the configured default. The
+        returned state includes the run id, which can be used to resume a failed run.
+        """
+        try:
+            return await run_graph("scribe", consultation_id, {
+                "audio_file_path": audio_file_path,
+                "scribe_mode": mode,
+            }, run_id=run_id)
+        finally:
+            await asyncio.to_thread(_remove_file, audio_file_path)
+
+    async def resume(self, consultation_id: int, run_id: str) -> dict:
+        """
+        Resumes a failed or interrupted run (see `resume_graph`). A run cut short
+        by a restart still has its recording, which is removed afterwards.
+        """
+        final_state = await resume_graph("scribe", consultation_id, run_id)
+        if final_state.get("audio_file_path"):
+            await asyncio.to_thread(_remove_file, final_state["audio_file_path"])
+        return final_state
+
+    async def submit(self, consultation_id: int, audio_file_path: str, mode: Optional[str] = None) -> ScribeJob:
+        """Creates a pending Scribe job and starts it in the background."""
+        async with AsyncSessionLocal() as db:
+            job = ScribeJob(consultation_id=consultation_id, run_id=new_run_id(), status=JobStatus.PENDING)
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+
+        task = asyncio.create_task(self._run_job(job.id, job.run_id, consultation_id, audio_file_path, mode))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def fail_interrupted_jobs(self) -> int:
+        """
+        Marks jobs a stopped process left PENDING or RUNNING as failed; their tasks
+        died with it. The graph run keeps its checkpoints, so it can still be resumed
+        with the job's run id.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(ScribeJob)
+                .where(ScribeJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING]))
+                .values(
+                    status=JobStatus.FAILED,
+                    error=INTERRUPTED_JOB_ERROR,
+                    finished_at=datetime.now(timezone.utc)
+                )
+            )
+            await db.commit()
+        if result.rowcount:
+            print(f"INFO: Marked {result.rowcount} interrupted Scribe job(s) as failed.")
+        return result.rowcount
+
+    async def _update_job(self, job_id: int, **fields):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(ScribeJob).where(ScribeJob.id == job_id))
+            job = result.scalars().first()
+            for name, value in fields.items():
+                setattr(job, name, value)
+            await db.commit()
+
+    async def _run_job(
+            self, job_id: int, run_id: str, consultation_id: int, audio_file_path: str, mode: Optional[str]
+    ):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+        async with self._semaphore:
+            try:
+                await self._update_job(job_id, status=JobStatus.RUNNING, started_at=datetime.now(timezone.utc))
+                final_state = await self.run(consultation_id, audio_file_path, mode, run_id)
+                if final_state.get("error"):
+                    await self._update_job(
+                        job_id, status=JobStatus.FAILED, error=final_state["error"],
+                        finished_at=datetime.now(timezone.utc)
+                    )
+                else:
+                    await self._update_job(job_id, status=JobStatus.DONE, finished_at=datetime.now(timezone.utc))
+            except Exception as e:
+                print(f"ERROR: Scribe job {job_id} failed. Error: {e}")
+                await self._update_job(
+                    job_id, status=JobStatus.FAILED, error=str(e), finished_at=datetime.now(timezone.utc)
+                )
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+scribe_service = ScribeService(max_concurrent_jobs=settings.SCRIBE_MAX_CONCURRENT_JOBS)
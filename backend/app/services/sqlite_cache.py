@@ -0,0 +1,96 @@
+# backend/app/services/sqlite_cache.py
+
+import atexit
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from app.core.config import settings
+
+_fake_cache_dir = None
+
+
+def cache_path(path: str) -> str:
+    """
+    Where a persistent cache lives. With the fake LLM backend every cache goes
+    to a throwaway directory, so fake output never fills or evicts the real ones.
+    """
+    global _fake_cache_dir
+    if settings.LLM_BACKEND != "fake":
+        return path
+    if _fake_cache_dir is None:
+        _fake_cache_dir = tempfile.mkdtemp(prefix="fake_llm_caches_")
+        atexit.register(shutil.rmtree, _fake_cache_dir, True)
+    return os.path.join(_fake_cache_dir, os.path.basename(path))
+
+
+class SQLiteLRUCache:
+    """
+    Base for persistent caches stored in one SQLite table. Every row carries a
+    `last_used` timestamp, and the least recently used rows are evicted once
+    the table grows past `max_entries`. Subclasses set `TABLE`, `COLUMNS` (the
+    key and value column definitions) and `PRIMARY_KEY`, and do their reads and
+    writes under `self._lock`, calling `_added` after inserting rows.
+    """
+
+    TABLE: str = None
+    COLUMNS: str = None
+    PRIMARY_KEY: str = None
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # One shared connection; access is serialized with the lock.
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+            f" {self.COLUMNS}, last_used REAL NOT NULL, PRIMARY KEY ({self.PRIMARY_KEY}))"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{self.TABLE}_last_used ON {self.TABLE} (last_used)")
+        self._conn.commit()
+        self._entries = self._count()
+
+    def _count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]
+
+    def _added(self, count: int):
+        """Call with the lock held after inserting `count` rows, before committing."""
+        self._entries += count
+        if self._entries > self.max_entries:
+            self._evict()
+
+    def _evict(self):
+        # Recount first: other processes share the file, and REPLACEs don't grow the table.
+        self._entries = self._count()
+        if self._entries <= self.max_entries:
+            return
+        # Evict down to 90% so we don't pay for an eviction on every insert.
+        excess = self._entries - int(self.max_entries * 0.9)
+        self._conn.execute(
+            f"DELETE FROM {self.TABLE} WHERE rowid IN (SELECT rowid FROM {self.TABLE} ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._entries -= excess
+        self.evictions += excess
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,95 @@
+# backend/app/services/summarization_service.py
+
+import asyncio
+from typing import List, Optional
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import PromptTemplate
+
+from app.core.config import settings
+from app.services.embedding_cache import normalize_text
+from app.services.summary_cache import SummaryCache, content_key
+
+# Same wording as LangChain's default map_reduce prompts, so summaries read as before.
+MAP_PROMPT_TEMPLATE = """Write a concise summary of the following:
+
+
+"{text}"
+
+
+CONCISE SUMMARY:"""
+MAP_PROMPT = PromptTemplate.from_template(MAP_PROMPT_TEMPLATE)
+REDUCE_PROMPT = PromptTemplate.from_template(MAP_PROMPT_TEMPLATE)
+
+MAP_CACHE_NAMESPACE = "text_map"
+# Upper bound on reduce levels, in case the model does not shrink oversized summaries.
+MAX_REDUCE_LEVELS = 5
+
+
+class SummarizationEngine:
+    """
+    Async map-reduce summarizer. Page summaries (the map step) run concurrently
+    up to `max_concurrency` and are cached by content, and the reduce step
+    collapses them level by level so no single call exceeds `reduce_token_budget`.
+    The reduce step can use a different (e.g. stronger) model than the map step.
+    """
+
+    def __init__(self, llm: BaseChatModel, cache: SummaryCache,
+                 max_concurrency: int = settings.SUMMARY_MAP_CONCURRENCY,
+                 reduce_token_budget: int = settings.SUMMARY_REDUCE_TOKEN_BUDGET,
+                 reduce_llm: Optional[BaseChatModel] = None):
+        self.llm = llm
+        self.reduce_llm = reduce_llm or llm
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.reduce_token_budget = reduce_token_budget
+        self.model_name = getattr(llm, "model_name", type(llm).__name__)
+
+    async def _summarize_text(self, llm: BaseChatModel, prompt: PromptTemplate, text: str,
+                              semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            response = await llm.ainvoke(prompt.format(text=text))
+        return response.content
+
+    async def _map(self, document: Document, semaphore: asyncio.Semaphore) -> str:
+        text = normalize_text(document.page_content)
+        key = content_key(self.model_name, MAP_PROMPT_TEMPLATE, text)
+        cached = self.cache.get(MAP_CACHE_NAMESPACE, key)
+        if cached is not None:
+            return cached
+        summary = await self._summarize_text(self.llm, MAP_PROMPT, document.page_content, semaphore)
+        self.cache.put(MAP_CACHE_NAMESPACE, key, summary)
+        return summary
+
+    def _group_by_budget(self, summaries: List[str]) -> List[List[str]]:
+        """Packs consecutive summaries into groups that fit the reduce token budget."""
+        groups, current, current_tokens = [], [], 0
+        for summary in summaries:
+            tokens = self.reduce_llm.get_num_tokens(summary)
+            if current and current_tokens + tokens > self.reduce_token_budget:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _reduce(self, summaries: List[str], semaphore: asyncio.Semaphore) -> str:
+        for _ in range(MAX_REDUCE_LEVELS):
+            groups = self._group_by_budget(summaries)
+            if len(groups) == 1:
+                break
+            summaries = await asyncio.gather(
+                *(self._summarize_text(self.reduce_llm, REDUCE_PROMPT, "\n\n".join(group), semaphore) for group in groups)
+            )
+        return await self._summarize_text(self.reduce_llm, REDUCE_PROMPT, "\n\n".join(summaries), semaphore)
+
+    async def summarize(self, documents: List[Document]) -> str:
+        """Summarizes a list of pages into a single summary."""
+        documents = [doc for doc in documents if doc.page_content.strip()]
+        if not documents:
+            return ""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        summaries = await asyncio.gather(*(self._map(doc, semaphore) for doc in documents))
+        return await self._reduce(list(summaries), semaphore)
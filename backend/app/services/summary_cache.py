@@ -0,0 +1,60 @@
+# backend/app/services/summary_cache.py
+
+import hashlib
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.services.sqlite_cache import SQLiteLRUCache, cache_path
+
+
+def content_key(*parts: str) -> str:
+    """Builds a cache key from the parts that determine an LLM output (model, prompt, content)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SummaryCache(SQLiteLRUCache):
+    """
+    Persistent cache of LLM-generated text (chunk summaries, image summaries),
+    stored in SQLite and grouped by namespace. Least recently used entries are
+    evicted once the cache grows past `max_entries`.
+    """
+
+    TABLE = "summaries"
+    COLUMNS = "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL"
+    PRIMARY_KEY = "namespace, key"
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM summaries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE summaries SET last_used = ? WHERE namespace = ? AND key = ?",
+                (time.time(), namespace, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, namespace: str, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (namespace, key, value, last_used) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, time.time()),
+            )
+            self._added(1)
+            self._conn.commit()
+
+
+summary_cache = SummaryCache(
+    path=cache_path(settings.SUMMARY_CACHE_PATH),
+    max_entries=settings.SUMMARY_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,176 @@
+# backend/app/services/transcription_service.py
+
+import asyncio
+import io
+import os
+import re
+import shutil
+import wave
+from difflib import SequenceMatcher
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.llm_gateway import llm_gateway
+
+# Audio is decoded once to 16 kHz mono 16-bit PCM, which Whisper resamples to anyway.
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+BYTES_PER_SECOND = SAMPLE_RATE * SAMPLE_WIDTH
+
+# Whisper rejects uploads above 25 MB.
+WHISPER_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Only this many words at each segment boundary are compared when removing the overlap.
+OVERLAP_SEARCH_WORDS = 60
+# Shorter matches are treated as coincidence rather than repeated speech.
+MIN_OVERLAP_MATCH_WORDS = 3
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+async def decode_to_pcm(path: str, start_seconds: float = 0.0) -> bytes:
+    """
+    Decodes any audio file ffmpeg understands (webm, mp3, wav, ...) to raw PCM,
+    optionally starting `start_seconds` into the recording.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-v", "error", "-ss", f"{start_seconds:.3f}", "-i", path,
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    pcm, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode {path}: {stderr.decode(errors='replace').strip()}")
+    return pcm
+
+
+def split_pcm(pcm: bytes, segment_seconds: int, overlap_seconds: int) -> List[bytes]:
+    """Splits PCM into segments of `segment_seconds`, each overlapping the previous one."""
+    segment_bytes = segment_seconds * BYTES_PER_SECOND
+    step_bytes = (segment_seconds - overlap_seconds) * BYTES_PER_SECOND
+    if len(pcm) <= segment_bytes:
+        return [pcm]
+    segments = []
+    for start in range(0, len(pcm), step_bytes):
+        segments.append(pcm[start:start + segment_bytes])
+        if start + segment_bytes >= len(pcm):
+            break
+    return segments
+
+
+def pcm_to_wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def merge_transcripts(transcripts: List[str]) -> str:
+    """
+    Joins the transcripts of overlapping segments in order. The words spoken in
+    each overlap appear at the end of one transcript and the start of the next;
+    the longest run of matching words there is kept once.
+    """
+    merged: List[str] = []
+    for text in transcripts:
+        words = text.split()
+        if not merged:
+            merged = words
+            continue
+        tail = merged[-OVERLAP_SEARCH_WORDS:]
+        head = words[:OVERLAP_SEARCH_WORDS]
+        matcher = SequenceMatcher(
+            None, [_normalize_word(w) for w in tail], [_normalize_word(w) for w in head], autojunk=False
+        )
+        match = matcher.find_longest_match(0, len(tail), 0, len(head))
+        if match.size >= MIN_OVERLAP_MATCH_WORDS:
+            # Keep the earlier segment up to the end of the match, then continue after it in the later one.
+            cut = len(merged) - len(tail) + match.a + match.size
+            merged = merged[:cut] + words[match.b + match.size:]
+        else:
+            merged = merged + words
+    return " ".join(merged)
+
+
+class TranscriptionService:
+    """
+    Transcribes consultation recordings with Whisper. Long recordings are split
+    into overlapping segments that are transcribed concurrently (at most
+    `max_concurrency` requests at a time) and stitched back together in order,
+    so wall time is roughly that of one segment and no request exceeds Whisper's
+    upload limit.
+    """
+
+    def __init__(self, segment_seconds: int, overlap_seconds: int, max_concurrency: int):
+        if overlap_seconds >= segment_seconds:
+            raise ValueError("Segment overlap must be shorter than the segment itself.")
+        self.segment_seconds = segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self.max_concurrency = max_concurrency
+        self.client = llm_gateway.openai_client(settings.WHISPER_MODEL)
+
+    async def _transcribe_bytes(self, filename: str, audio_bytes: bytes) -> str:
+        transcription = await self.client.audio.transcriptions.create(
+            model=settings.WHISPER_MODEL,
+            file=(filename, audio_bytes)
+        )
+        return transcription.text
+
+    async def transcribe(self, audio_path: str, pcm: Optional[bytes] = None) -> str:
+        """Transcribes a recording. Pass `pcm` if it has already been decoded, so it is not decoded again."""
+        if pcm is None:
+            try:
+                pcm = await decode_to_pcm(audio_path)
+            except FileNotFoundError:
+                # No ffmpeg on this host: fall back to a single request with the original file.
+                print("WARNING: ffmpeg not found; transcribing the recording in a single request.")
+                audio_bytes = await asyncio.to_thread(_read_file, audio_path)
+                return await self._transcribe_bytes(os.path.basename(audio_path), audio_bytes)
+
+        segments = split_pcm(pcm, self.segment_seconds, self.overlap_seconds)
+        if len(segments) == 1:
+            # The original (compressed) file is much smaller than WAV, so send it as is when it fits.
+            audio_bytes = await asyncio.to_thread(_read_file, audio_path)
+            if len(audio_bytes) <= WHISPER_MAX_UPLOAD_BYTES:
+                return await self._transcribe_bytes(os.path.basename(audio_path), audio_bytes)
+
+        print(f"Transcribing {audio_path} as {len(segments)} segments of up to {self.segment_seconds}s")
+        return await self._transcribe_segments(segments)
+
+    async def transcribe_pcm(self, pcm: bytes) -> str:
+        """Transcribes decoded PCM (see `decode_to_pcm`), segmenting it if it is long."""
+        return await self._transcribe_segments(split_pcm(pcm, self.segment_seconds, self.overlap_seconds))
+
+    async def _transcribe_segments(self, segments: List[bytes]) -> str:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def transcribe_segment(index: int, segment: bytes) -> str:
+            async with semaphore:
+                return await self._transcribe_bytes(f"segment_{index}.wav", pcm_to_wav(segment))
+
+        transcripts = await asyncio.gather(
+            *(transcribe_segment(index, segment) for index, segment in enumerate(segments))
+        )
+        return merge_transcripts(list(transcripts))
+
+
+transcription_service = TranscriptionService(
+    segment_seconds=settings.SCRIBE_SEGMENT_SECONDS,
+    overlap_seconds=settings.SCRIBE_SEGMENT_OVERLAP_SECONDS,
+    max_concurrency=settings.SCRIBE_TRANSCRIBE_CONCURRENCY,
+)
@@ -0,0 +1,127 @@
+# backend/app/services/vector_index_service.py
+
+import uuid
+from typing import Callable, Dict, List
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+# Namespace for deterministic point ids; must never change or existing points get orphaned.
+POINT_ID_NAMESPACE = uuid.UUID("6f1c7a2e-3d4b-4f5a-9c8e-1b2a3c4d5e6f")
+
+# Payload keys used by the LangChain Qdrant wrapper, so RAGAgent can read these points.
+CONTENT_PAYLOAD_KEY = "page_content"
+METADATA_PAYLOAD_KEY = "metadata"
+
+
+# Called with a consultation id whenever its collection changes (e.g. to drop warm retrievers).
+_index_listeners: List[Callable[[int], None]] = []
+
+
+def add_index_listener(listener: Callable[[int], None]):
+    """Registers a callback to run after a consultation's collection is modified."""
+    _index_listeners.append(listener)
+
+
+def _notify_index_changed(consultation_id: int):
+    for listener in _index_listeners:
+        listener(consultation_id)
+
+
+def collection_name_for(consultation_id: int) -> str:
+    return f"consultation_{consultation_id}"
+
+
+def point_id_for(report_id: int, chunk_index: int) -> str:
+    """Stable point id for a chunk, derived from its report id and position."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"report:{report_id}:chunk:{chunk_index}"))
+
+
+class VectorIndexService:
+    """
+    Append-only, per-consultation vector index. Each upload only embeds and
+    upserts its own chunks; earlier reports in the collection are left untouched.
+    """
+
+    def __init__(self, qdrant_client: QdrantClient, embeddings: Embeddings):
+        self.qdrant_client = qdrant_client
+        self.embeddings = embeddings
+
+    def _ensure_collection(self, collection_name: str, vector_size: int):
+        if self.qdrant_client.collection_exists(collection_name):
+            return
+        try:
+            self.qdrant_client.create_collection(
+                collection_name=collection_name,
+                vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
+            )
+        except Exception:
+            # Another worker may have created it between the check and the create.
+            if not self.qdrant_client.collection_exists(collection_name):
+                raise
+
+    def _report_filter(self, report_id: int) -> models.Filter:
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=f"{METADATA_PAYLOAD_KEY}.report_id",
+                    match=models.MatchValue(value=report_id),
+                )
+            ]
+        )
+
+    def index_report(self, consultation_id: int, report_id: int, chunks: List[Document]) -> int:
+        """
+        Replaces the chunks of one report in the consultation's collection.
+        Returns the number of points written.
+        """
+        return self.index_reports(consultation_id, {report_id: chunks})
+
+    def index_reports(self, consultation_id: int, chunks_by_report: Dict[int, List[Document]]) -> int:
+        """
+        Replaces the chunks of several reports at once, embedding all of them in
+        one batched call. Returns the number of points written.
+        """
+        collection_name = collection_name_for(consultation_id)
+        items = [
+            (report_id, chunk_index, chunk)
+            for report_id, chunks in chunks_by_report.items()
+            for chunk_index, chunk in enumerate(chunks)
+        ]
+        if not items:
+            for report_id in chunks_by_report:
+                self.delete_report(consultation_id, report_id)
+            return 0
+
+        vectors = self.embeddings.embed_documents([chunk.page_content for _, _, chunk in items])
+        self._ensure_collection(collection_name, len(vectors[0]))
+        # Drop any chunks from a previous version of these reports before writing the new ones.
+        for report_id in chunks_by_report:
+            self.delete_report(consultation_id, report_id)
+
+        points = []
+        for (report_id, chunk_index, chunk), vector in zip(items, vectors):
+            metadata = dict(chunk.metadata, report_id=report_id, chunk_index=chunk_index)
+            points.append(
+                models.PointStruct(
+                    id=point_id_for(report_id, chunk_index),
+                    vector=vector,
+                    payload={CONTENT_PAYLOAD_KEY: chunk.page_content, METADATA_PAYLOAD_KEY: metadata},
+                )
+            )
+        self.qdrant_client.upsert(collection_name=collection_name, points=points, wait=True)
+        _notify_index_changed(consultation_id)
+        return len(points)
+
+    def delete_report(self, consultation_id: int, report_id: int):
+        """Removes every chunk of a report from the consultation's collection."""
+        collection_name = collection_name_for(consultation_id)
+        if not self.qdrant_client.collection_exists(collection_name):
+            return
+        self.qdrant_client.delete(
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(filter=self._report_filter(report_id)),
+            wait=True,
+        )
+        _notify_index_changed(consultation_id)
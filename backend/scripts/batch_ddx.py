@@ -0,0 +1,63 @@
+# backend/scripts/batch_ddx.py
+#
+# Generates the DDx for a list of consultations or a doctor's schedule, e.g. the
+# night before clinic. Same pipeline as POST /api/v1/ddx/batch.
+#
+# Usage (from backend/):
+#   python -m scripts.batch_ddx --ids 12 13 14
+#   python -m scripts.batch_ddx --doctor-id 3 --date 2026-10-18
+#   python -m scripts.batch_ddx --doctor-id 3 --from 2026-10-19 --to 2026-10-23 --concurrency 8
+
+import argparse
+import asyncio
+from datetime import date
+
+from app.agents.checkpointing import close_checkpointer
+from app.core.config import settings
+from app.services.ddx_batch_service import run_ddx_batch, scheduled_consultation_ids
+
+
+def _report(result: dict):
+    for item in result["items"]:
+        line = f"  consultation {item['consultation_id']:>6}: {item['status']}"
+        if item["run_id"]:
+            line += f" (run {item['run_id']})"
+        if item["error"]:
+            line += f" - {item['error']}"
+        print(line)
+    print(f"\n{result['total']} consultation(s) in {result['seconds']:.1f}s "
+          f"({result['consultations_per_minute']:.1f}/min): {result['generated']} generated, "
+          f"{result['reused']} reused, {result['failed']} failed, {result['not_found']} not found")
+
+
+async def main(args) -> int:
+    try:
+        if args.ids:
+            consultation_ids = args.ids
+        else:
+            date_from = args.date or args.date_from
+            date_to = args.date or args.date_to
+            consultation_ids = await asyncio.to_thread(scheduled_consultation_ids, args.doctor_id, date_from, date_to)
+        if not consultation_ids:
+            print("No consultations found.")
+            return 0
+        print(f"Generating the DDx for {len(consultation_ids)} consultation(s)...")
+        result = await run_ddx_batch(consultation_ids, force=args.force, max_concurrency=args.concurrency)
+        _report(result)
+        return 1 if result["failed"] else 0
+    finally:
+        await close_checkpointer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the DDx for many consultations at once.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--ids", type=int, nargs="+", help="Consultation ids.")
+    target.add_argument("--doctor-id", type=int, help="Use this doctor's scheduled consultations.")
+    parser.add_argument("--date", type=date.fromisoformat, help="A single day of the schedule (default: today).")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="First day of the schedule.")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="Last day of the schedule.")
+    parser.add_argument("--force", action="store_true", help="Regenerate even if the data is unchanged.")
+    parser.add_argument("--concurrency", type=int, default=settings.DDX_BATCH_CONCURRENCY,
+                        help=f"DDx runs in flight at once (default: {settings.DDX_BATCH_CONCURRENCY}).")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
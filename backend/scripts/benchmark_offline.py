@@ -0,0 +1,130 @@
+# backend/scripts/benchmark_offline.py
+#
+# Runs the AI pipelines end to end against the offline backends (fake OpenAI
+# models, in-memory Qdrant) and reports where the time goes. With
+# --zero-latency the fakes answer instantly, so the timings are purely our own
+# overhead (parsing, chunking, caching, prompt building, graph plumbing).
+# The database is not used: the consultation agent's reads are answered from
+# the reports processed in the run.
+#
+# Usage (from backend/):
+#   python -m scripts.benchmark_offline reports/*.pdf --audio visit.webm --runs 3
+#   python -m scripts.benchmark_offline reports/*.pdf --zero-latency
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Must be set before the app's settings are imported.
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("VECTOR_DB_BACKEND", "memory")
+if "--zero-latency" in sys.argv:
+    for name in ("FAKE_LLM_LATENCY_SECONDS", "FAKE_LLM_SECONDS_PER_INPUT_TOKEN", "FAKE_LLM_SECONDS_PER_OUTPUT_TOKEN",
+                 "FAKE_EMBEDDING_LATENCY_SECONDS", "FAKE_EMBEDDING_SECONDS_PER_TOKEN",
+                 "FAKE_WHISPER_LATENCY_SECONDS", "FAKE_WHISPER_SECONDS_PER_AUDIO_SECOND"):
+        os.environ[name] = "0"
+
+from app.agents import consultation_agent
+from app.agents.consultation_agent import get_consultation_agent
+from app.agents.nodes.diagnosis_nodes import DiagnosisNodes
+from app.agents.nodes.scribe_nodes import ScribeNodes, SCRIBE_MODES
+from app.agents.rag_agent import RAGAgent
+from app.core.config import settings
+from app.db.vector_db import get_qdrant_client
+from app.services.answer_cache import semantic_answer_cache
+from app.services.document_service import DocumentService
+from app.services.llm_gateway import llm_gateway
+
+# Consultation id used for the benchmark's vector collection.
+BENCHMARK_CONSULTATION_ID = 0
+QUESTION = "What abnormal findings are mentioned in the reports?"
+AGENT_QUESTION = "Summarize the key findings of this consultation."
+
+
+async def _timed(results: dict, stage: str, function, *args):
+    started = time.perf_counter()
+    result = await function(*args)
+    results.setdefault(stage, []).append(time.perf_counter() - started)
+    return result
+
+
+def _serve_consultation_from_memory(summaries: list):
+    """
+    The consultation agent reads the report summaries (and the answer cache's
+    fingerprint of the consultation) from MySQL; serve them from the reports
+    processed in this run instead.
+    """
+    async def fetch_report_summaries(consultation_id: int) -> str:
+        return "\n\n".join(summaries) or "No reports have been uploaded for this consultation yet."
+
+    async def state_version(consultation_id: int) -> str:
+        return "benchmark"
+
+    consultation_agent.fetch_report_summaries = fetch_report_summaries
+    semantic_answer_cache.state_version = state_version
+
+
+async def _run_once(paths, audio_path, results: dict):
+    document_service = DocumentService(get_qdrant_client())
+    summaries = []
+    for report_id, path in enumerate(paths, start=1):
+        processed = await _timed(
+            results, "report processing", asyncio.to_thread,
+            document_service.process_and_store_report, path, BENCHMARK_CONSULTATION_ID, report_id
+        )
+        summaries.append(processed.summary)
+
+    if any(os.path.splitext(path)[1].lower() in (".pdf", ".docx") for path in paths):
+        rag_agent = RAGAgent(BENCHMARK_CONSULTATION_ID)
+        await _timed(results, "rag question", rag_agent.answer_question, QUESTION)
+
+    _serve_consultation_from_memory(summaries)
+    # Time the agent itself rather than an answer cached by the previous run.
+    semantic_answer_cache.invalidate(BENCHMARK_CONSULTATION_ID)
+    await _timed(results, "agent question", get_consultation_agent().answer_question,
+                 BENCHMARK_CONSULTATION_ID, AGENT_QUESTION)
+
+    nodes = ScribeNodes()
+    if audio_path:
+        state = await _timed(results, "transcription", nodes.transcribe_audio, {"audio_file_path": audio_path})
+    else:
+        state = {"transcription": "Patient reports chest pain and fever for three days. " * 50}
+    for mode in SCRIBE_MODES:
+        if mode == "single_pass":
+            await _timed(results, "scribe single_pass", nodes.structure_and_generate_note, state)
+        else:
+            structured = await _timed(results, "scribe two_step", nodes.structure_transcript, state)
+            await _timed(results, "scribe two_step", nodes.generate_soap_note, {**state, **structured})
+
+    context = "Patient Notes: chest pain\n\n" + "\n\n".join(summaries)
+    await _timed(results, "ddx", asyncio.to_thread, DiagnosisNodes().generate_ddx_report,
+                 {"patient_data_context": context})
+
+
+async def main(paths, audio_path, runs: int):
+    print(f"Backends: LLM={settings.LLM_BACKEND}, vector DB={settings.VECTOR_DB_BACKEND}; "
+          f"fake LLM latency {settings.FAKE_LLM_LATENCY_SECONDS}s + "
+          f"{settings.FAKE_LLM_SECONDS_PER_OUTPUT_TOKEN}s/output token")
+    results = {}
+    for _ in range(runs):
+        await _run_once(paths, audio_path, results)
+
+    print(f"\n{'stage':<22}{'calls':>6}{'mean':>10}{'median':>10}{'max':>10}")
+    for stage, seconds in results.items():
+        print(f"{stage:<22}{len(seconds):>6}{statistics.mean(seconds):>9.3f}s"
+              f"{statistics.median(seconds):>9.3f}s{max(seconds):>9.3f}s")
+    print(f"\nLLM gateway: {llm_gateway.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the AI pipelines offline against fake backends.")
+    parser.add_argument("reports", nargs="*", help="Report files (PDF, DOCX or images) to process.")
+    parser.add_argument("--audio", help="A consultation recording to transcribe (default: a canned transcript).")
+    parser.add_argument("--runs", type=int, default=3, help="Runs of the whole pipeline (default: 3).")
+    parser.add_argument("--zero-latency", action="store_true",
+                        help="Make the fake backends answer instantly, to time only our own code.")
+    args = parser.parse_args()
+    asyncio.run(main(args.reports, args.audio, args.runs))
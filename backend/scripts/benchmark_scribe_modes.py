@@ -0,0 +1,89 @@
+# backend/scripts/benchmark_scribe_modes.py
+#
+# Compares the two Scribe graph modes on the same transcript: latency, token
+# usage and how much of the structured summary and SOAP note gets filled in.
+# Nothing is saved to the database.
+#
+# Usage (from backend/):
+#   python -m scripts.benchmark_scribe_modes path/to/recording.webm --runs 5
+#   python -m scripts.benchmark_scribe_modes path/to/transcript.txt
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+from langchain_community.callbacks import get_openai_callback
+
+from app.agents.nodes.scribe_nodes import ScribeNodes, SCRIBE_MODES
+from app.services.transcription_service import transcription_service
+
+SOAP_SECTIONS = ("Subjective", "Objective", "Assessment", "Plan")
+
+
+async def _run_mode(nodes: ScribeNodes, mode: str, transcript: str) -> dict:
+    state = {"transcription": transcript}
+    with get_openai_callback() as usage:
+        started = time.perf_counter()
+        if mode == "single_pass":
+            state.update(await nodes.structure_and_generate_note(state))
+        else:
+            state.update(await nodes.structure_transcript(state))
+            if not state.get("error"):
+                state.update(await nodes.generate_soap_note(state))
+        seconds = time.perf_counter() - started
+    if state.get("error"):
+        raise RuntimeError(f"{mode} failed: {state['error']}")
+
+    summary = state["structured_summary"]
+    note = state["final_note"]
+    return {
+        "seconds": seconds,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cost_usd": usage.total_cost,
+        "fields_filled": sum(1 for items in summary.values() if items),
+        "items": sum(len(items) for items in summary.values()),
+        "sections": sum(1 for section in SOAP_SECTIONS if re.search(section, note, re.IGNORECASE)),
+    }
+
+
+def _report(mode: str, runs: list):
+    def mean(key):
+        return statistics.mean(run[key] for run in runs)
+
+    latencies = [run["seconds"] for run in runs]
+    print(f"\n{mode} ({len(runs)} runs)")
+    print(f"  latency:   mean {statistics.mean(latencies):.2f}s, median {statistics.median(latencies):.2f}s, "
+          f"min {min(latencies):.2f}s, max {max(latencies):.2f}s")
+    print(f"  tokens:    {mean('prompt_tokens'):.0f} prompt + {mean('completion_tokens'):.0f} completion "
+          f"(${mean('cost_usd'):.4f} per note)")
+    print(f"  coverage:  {mean('fields_filled'):.1f}/4 summary fields, {mean('items'):.1f} items, "
+          f"{mean('sections'):.1f}/{len(SOAP_SECTIONS)} SOAP sections")
+
+
+async def main(input_path: str, runs: int):
+    if input_path.endswith(".txt"):
+        with open(input_path, encoding="utf-8") as f:
+            transcript = f.read()
+    else:
+        print(f"Transcribing {input_path}...")
+        transcript = await transcription_service.transcribe(input_path)
+    print(f"Transcript: {len(transcript.split())} words")
+
+    nodes = ScribeNodes()
+    results = {mode: [] for mode in SCRIBE_MODES}
+    # Alternate modes so drift in API latency affects both equally.
+    for _ in range(runs):
+        for mode in SCRIBE_MODES:
+            results[mode].append(await _run_mode(nodes, mode, transcript))
+    for mode in SCRIBE_MODES:
+        _report(mode, results[mode])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the two-step and single-pass Scribe modes.")
+    parser.add_argument("input", help="An audio recording, or a .txt file with a transcript.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode (default: 3).")
+    args = parser.parse_args()
+    asyncio.run(main(args.input, args.runs))
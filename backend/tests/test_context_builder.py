@@ -0,0 +1,89 @@
+# backend/tests/test_context_builder.py
+
+import pytest
+
+from app.services import context_builder
+from app.services.context_builder import (
+    MIN_TRUNCATED_SECTION_TOKENS, TRUNCATION_MARKER, ContextBuilder, ContextSection
+)
+
+
+class WordEncoding:
+    """One token per word, so budgets in these tests can be counted by eye."""
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture(autouse=True)
+def word_encoding(monkeypatch):
+    monkeypatch.setattr(context_builder, "_get_encoding", lambda model: WordEncoding())
+
+
+def _words(prefix: str, count: int) -> str:
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+def test_everything_fits_in_order_with_shared_group_headings():
+    built = ContextBuilder(token_budget=100).build([
+        ContextSection("notes here", rank=(0,)),
+        ContextSection("report one", rank=(2,), group="Reports:"),
+        ContextSection("report two", rank=(1,), group="Reports:"),
+    ])
+
+    assert built.text == "notes here\n\nReports:\nreport one\n\nreport two"
+    assert built.stats() == {
+        "included_tokens": 6,
+        "dropped_tokens": 0,
+        "truncated_sections": 0,
+        "dropped_sections": 0,
+        "token_budget": 100,
+    }
+
+
+def test_lowest_ranks_are_kept_and_output_keeps_section_order():
+    built = ContextBuilder(token_budget=4).build([
+        ContextSection("old report", rank=(2,)),
+        ContextSection("notes here", rank=(0,)),
+        ContextSection("new report", rank=(1,)),
+    ])
+
+    # The budget is too small to truncate anything, so the worst-ranked section is dropped.
+    assert built.text == (
+        "notes here\n\nnew report\n\n[1 lower-priority section(s) omitted to fit the context budget]"
+    )
+    assert built.included_tokens == 4
+    assert built.dropped_tokens == 2
+    assert built.dropped_sections == 1
+
+
+def test_first_section_that_does_not_fit_is_truncated():
+    budget = MIN_TRUNCATED_SECTION_TOKENS + 10
+    built = ContextBuilder(token_budget=budget).build([
+        ContextSection(_words("a", 10), rank=(0,)),
+        ContextSection(_words("b", 200), rank=(1,)),
+        ContextSection(_words("c", 5), rank=(2,)),
+    ])
+
+    assert built.truncated_sections == 1
+    assert built.dropped_sections == 1
+    assert built.included_tokens == budget
+    assert built.dropped_tokens == 200 - MIN_TRUNCATED_SECTION_TOKENS + 5
+    kept_b = _words("b", MIN_TRUNCATED_SECTION_TOKENS)
+    assert f"\n\n{kept_b}{TRUNCATION_MARKER}\n\n" in built.text
+    assert "c0" not in built.text
+
+
+def test_too_little_budget_left_drops_instead_of_truncating():
+    built = ContextBuilder(token_budget=MIN_TRUNCATED_SECTION_TOKENS).build([
+        ContextSection(_words("a", 10), rank=(0,)),
+        ContextSection(_words("b", 200), rank=(1,)),
+    ])
+
+    assert built.truncated_sections == 0
+    assert built.dropped_sections == 1
+    assert TRUNCATION_MARKER not in built.text
+    assert built.text.startswith(_words("a", 10))
@@ -0,0 +1,74 @@
+# backend/tests/test_diagnosis_nodes.py
+
+import json
+from types import SimpleNamespace
+
+from app.agents.nodes.diagnosis_nodes import build_patient_context
+from app.services.rollup_service import soap_note_hash
+
+SOAP_NOTE = "Subjective: chest pain for three days."
+
+
+def _reports():
+    return [
+        SimpleNamespace(id=1, file_path="uploads/ecg.pdf", summary="Sinus rhythm, no ST changes."),
+        SimpleNamespace(id=2, file_path="uploads/bloods.pdf", summary="Troponin within normal limits."),
+        # Not summarized yet, so neither the rollup nor the fingerprint covers it.
+        SimpleNamespace(id=3, file_path="uploads/xray.png", summary=None),
+    ]
+
+
+def _consultation(rollup=None, merged_report_ids=(), ddx_result=None, ddx_fingerprint=None):
+    return SimpleNamespace(
+        id=7,
+        notes="Follow-up after ER visit.",
+        soap_note=SOAP_NOTE,
+        rollup_summary=rollup,
+        rollup_sources=json.dumps({"report_ids": list(merged_report_ids), "soap_note": soap_note_hash(SOAP_NOTE)}),
+        ddx_result=ddx_result,
+        ddx_fingerprint=ddx_fingerprint,
+    )
+
+
+def test_batch_and_rollup_runs_fingerprint_the_same_data():
+    # A batch run on a stale rollup builds the context from the report summaries...
+    from_summaries = build_patient_context(_consultation(), None, _reports(), force=False)
+    # ...and a later run uses the refreshed rollup of the same data, whatever its wording.
+    refreshed = _consultation(rollup="Chest pain; ECG and troponin normal.", merged_report_ids=(1, 2))
+    from_rollup = build_patient_context(refreshed, refreshed.rollup_summary, _reports(), force=False)
+
+    assert from_summaries["context_fingerprint"] == from_rollup["context_fingerprint"]
+    assert "Troponin within normal limits." in from_summaries["patient_data_context"]
+    assert "Chest pain; ECG and troponin normal." in from_rollup["patient_data_context"]
+
+
+def test_ddx_from_a_batch_run_is_reused_after_the_rollup_refresh():
+    batch = build_patient_context(_consultation(), None, _reports(), force=False)
+    refreshed = _consultation(
+        rollup="Reworded summary.", merged_report_ids=(1, 2),
+        ddx_result="Stored DDx", ddx_fingerprint=batch["context_fingerprint"],
+    )
+
+    update = build_patient_context(refreshed, refreshed.rollup_summary, _reports(), force=False)
+    assert update["cache_hit"] is True
+    assert update["ddx_result"] == "Stored DDx"
+
+    forced = build_patient_context(refreshed, refreshed.rollup_summary, _reports(), force=True)
+    assert forced["cache_hit"] is False
+
+
+def test_fingerprint_changes_with_a_report_summary():
+    before = build_patient_context(_consultation(), None, _reports(), force=False)
+    reports = _reports()
+    reports[1].summary = "Troponin elevated."
+    after = build_patient_context(_consultation(), None, reports, force=False)
+    assert before["context_fingerprint"] != after["context_fingerprint"]
+
+
+def test_rollup_fingerprint_only_covers_the_reports_it_merged():
+    reports = _reports()
+    reports[2].summary = "Clear lungs."  # Summarized after the rollup was refreshed.
+    consultation = _consultation(rollup="Summary of reports 1 and 2.", merged_report_ids=(1, 2))
+    with_rollup = build_patient_context(consultation, consultation.rollup_summary, reports, force=False)
+    without_new_report = build_patient_context(_consultation(), None, _reports(), force=False)
+    assert with_rollup["context_fingerprint"] == without_new_report["context_fingerprint"]
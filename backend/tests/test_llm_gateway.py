@@ -0,0 +1,179 @@
+# backend/tests/test_llm_gateway.py
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.services.llm_gateway import ConcurrencyLimit, LLMGateway, _LimitedAsyncTransport, parse_mapping
+
+
+def _wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the condition.")
+        time.sleep(0.001)
+
+
+def test_parse_mapping():
+    assert parse_mapping("ddx=gpt-4o, summary_map = gpt-4o-mini,") == {"ddx": "gpt-4o", "summary_map": "gpt-4o-mini"}
+    assert parse_mapping("") == {}
+    assert parse_mapping(None) == {}
+    # Only the first "=" separates key and value.
+    assert parse_mapping("model=a=b") == {"model": "a=b"}
+
+
+def test_release_hands_the_slot_to_a_waiting_thread():
+    limit = ConcurrencyLimit(1)
+    limit.acquire()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limit.acquire(), acquired.set()))
+    waiter.start()
+    _wait_for(lambda: len(limit._waiters) == 1)
+    assert not acquired.is_set()
+
+    limit.release()
+    waiter.join(timeout=2)
+    assert acquired.is_set()
+    # The slot moved to the waiter rather than being freed and taken again.
+    assert limit.in_use == 1
+    limit.release()
+    assert limit.in_use == 0
+
+
+def test_waiters_are_served_in_order():
+    async def scenario():
+        limit = ConcurrencyLimit(1)
+        await limit.aacquire()
+        order = []
+
+        async def worker(name):
+            await limit.aacquire()
+            order.append(name)
+            limit.release()
+
+        tasks = [asyncio.create_task(worker(name)) for name in ("first", "second", "third")]
+        await asyncio.sleep(0)
+        # A newcomer must queue behind the waiters even though the slot is about to be free.
+        assert len(limit._waiters) == 3
+        limit.release()
+        await asyncio.gather(*tasks)
+        return order, limit.in_use
+
+    order, in_use = asyncio.run(scenario())
+    assert order == ["first", "second", "third"]
+    assert in_use == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limit = ConcurrencyLimit(1)
+        await limit.aacquire()
+        task = asyncio.create_task(limit.aacquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert not limit._waiters
+        limit.release()
+        return limit.in_use
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_waiter_cancelled_after_the_handoff_passes_the_slot_on():
+    async def scenario():
+        limit = ConcurrencyLimit(1)
+        await limit.aacquire()
+        cancelled = asyncio.create_task(limit.aacquire())
+        next_in_line = asyncio.create_task(limit.aacquire())
+        await asyncio.sleep(0)
+        # The slot is handed to the first waiter, which is cancelled before it wakes up.
+        limit.release()
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        await asyncio.wait_for(next_in_line, timeout=2)
+        in_use = limit.in_use
+        limit.release()
+        return in_use, limit.in_use
+
+    assert asyncio.run(scenario()) == (1, 0)
+
+
+def test_release_from_another_thread_wakes_a_waiter_on_its_own_loop():
+    limit = ConcurrencyLimit(1)
+    limit.acquire()
+    acquired = threading.Event()
+
+    def waiter():
+        async def acquire():
+            await limit.aacquire()
+            acquired.set()
+        asyncio.run(acquire())
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    _wait_for(lambda: len(limit._waiters) == 1)
+    limit.release()
+    thread.join(timeout=2)
+    assert acquired.is_set()
+    assert limit.in_use == 1
+
+
+class _Pool:
+    """Stands in for the shared connection pool; responses wait until `open` is set."""
+
+    def __init__(self):
+        self.open = asyncio.Event()
+
+    async def handle_async_request(self, request):
+        await self.open.wait()
+        return httpx.Response(200, stream=httpx.ByteStream(b"{}"))
+
+
+class _Pools:
+    def __init__(self, pool):
+        self._pool = pool
+
+    def get(self):
+        return self._pool
+
+
+def _gateway(max_concurrency: int, model_max_concurrency: int) -> LLMGateway:
+    return LLMGateway(
+        backend="openai", api_key="test-key", default_model="model-a", stage_models={},
+        max_concurrency=max_concurrency, model_max_concurrency=model_max_concurrency, model_concurrency={},
+        timeout_seconds=10, max_retries=0, max_connections=4, max_keepalive_connections=4,
+    )
+
+
+def test_request_queued_on_a_busy_model_does_not_hold_a_global_slot():
+    async def scenario():
+        gateway = _gateway(max_concurrency=2, model_max_concurrency=1)
+        slow_pool, fast_pool = _Pool(), _Pool()
+        fast_pool.open.set()
+        transport_a = _LimitedAsyncTransport(_Pools(slow_pool), gateway._limits_for("model-a"))
+        transport_b = _LimitedAsyncTransport(_Pools(fast_pool), gateway._limits_for("model-b"))
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+        running_a = asyncio.create_task(transport_a.handle_async_request(request))
+        queued_a = asyncio.create_task(transport_a.handle_async_request(request))
+        await asyncio.sleep(0.01)
+        # model-a is saturated, but only its running request counts against the global limit.
+        assert gateway.stats()["in_flight"] == 1
+        response_b = await asyncio.wait_for(transport_b.handle_async_request(request), timeout=2)
+        await response_b.aclose()
+
+        slow_pool.open.set()
+        for task in (running_a, queued_a):
+            response = await asyncio.wait_for(task, timeout=2)
+            await response.aclose()
+        return gateway.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight"] == 0
+    assert all(model["in_flight"] == 0 for model in stats["models"].values())
@@ -0,0 +1,37 @@
+# backend/tests/test_rollup_service.py
+
+import json
+from types import SimpleNamespace
+
+from app.services.rollup_service import rollup_is_current, soap_note_hash
+
+
+def _consultation(rollup="Summary so far.", report_ids=(1, 2), soap_note="SOAP note", merged_soap_note="SOAP note"):
+    return SimpleNamespace(
+        rollup_summary=rollup,
+        rollup_sources=json.dumps({"report_ids": list(report_ids), "soap_note": soap_note_hash(merged_soap_note)}),
+        soap_note=soap_note,
+    )
+
+
+def test_current_when_reports_and_soap_note_match():
+    assert rollup_is_current(_consultation(), {1, 2})
+
+
+def test_stale_without_a_rollup():
+    assert not rollup_is_current(_consultation(rollup=None), {1, 2})
+    assert not rollup_is_current(SimpleNamespace(rollup_summary=None, rollup_sources=None, soap_note=None), set())
+
+
+def test_stale_when_a_report_was_added_or_removed():
+    assert not rollup_is_current(_consultation(), {1, 2, 3})
+    assert not rollup_is_current(_consultation(), {1})
+
+
+def test_stale_when_the_soap_note_changed():
+    assert not rollup_is_current(_consultation(soap_note="Revised SOAP note"), {1, 2})
+    assert not rollup_is_current(_consultation(soap_note="SOAP note", merged_soap_note=None), {1, 2})
+
+
+def test_current_without_a_soap_note_on_either_side():
+    assert rollup_is_current(_consultation(soap_note=None, merged_soap_note=None), {1, 2})
@@ -0,0 +1,62 @@
+# backend/tests/test_transcription_service.py
+
+from app.services.transcription_service import BYTES_PER_SECOND, merge_transcripts, split_pcm
+
+
+def _pcm(seconds: int) -> bytes:
+    # Each second gets a distinct byte so segment boundaries can be checked.
+    return b"".join(bytes([second % 256]) * BYTES_PER_SECOND for second in range(seconds))
+
+
+def test_split_pcm_short_audio_is_one_segment():
+    pcm = _pcm(10)
+    assert split_pcm(pcm, segment_seconds=10, overlap_seconds=2) == [pcm]
+
+
+def test_split_pcm_segments_overlap():
+    pcm = _pcm(25)
+    segments = split_pcm(pcm, segment_seconds=10, overlap_seconds=2)
+
+    # Segments start every 8 s: 0-10, 8-18, 16-25.
+    assert len(segments) == 3
+    assert segments[0] == pcm[:10 * BYTES_PER_SECOND]
+    assert segments[1] == pcm[8 * BYTES_PER_SECOND:18 * BYTES_PER_SECOND]
+    assert segments[2] == pcm[16 * BYTES_PER_SECOND:]
+    # The last two seconds of each segment open the next one.
+    assert segments[0][-2 * BYTES_PER_SECOND:] == segments[1][:2 * BYTES_PER_SECOND]
+
+
+def test_split_pcm_covers_all_audio_without_a_trailing_sliver():
+    pcm = _pcm(18)
+    segments = split_pcm(pcm, segment_seconds=10, overlap_seconds=2)
+
+    # The second segment reaches the end, so no third segment made only of overlap is produced.
+    assert len(segments) == 2
+    assert segments[-1].endswith(pcm[-BYTES_PER_SECOND:])
+
+
+def test_merge_transcripts_removes_repeated_overlap():
+    merged = merge_transcripts([
+        "the patient reports chest pain since yesterday",
+        "pain since yesterday and mild fever at night",
+    ])
+    assert merged == "the patient reports chest pain since yesterday and mild fever at night"
+
+
+def test_merge_transcripts_ignores_case_and_punctuation_in_overlap():
+    merged = merge_transcripts([
+        "No known allergies. Takes aspirin daily.",
+        "takes aspirin daily, and metformin twice a day",
+    ])
+    assert merged == "No known allergies. Takes aspirin daily. and metformin twice a day"
+
+
+def test_merge_transcripts_keeps_short_coincidental_matches():
+    merged = merge_transcripts(["blood pressure is fine", "fine motor skills are intact"])
+    assert merged == "blood pressure is fine fine motor skills are intact"
+
+
+def test_merge_transcripts_handles_empty_and_single_input():
+    assert merge_transcripts([]) == ""
+    assert merge_transcripts(["only one segment"]) == "only one segment"
+    assert merge_transcripts(["", "second segment"]) == "second segment"
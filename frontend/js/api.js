@@ -26,6 +26,9 @@ const api = {
         formData.append('file', file);
         return fetch(`${API_BASE_URL}/consultations/${consultationId}/upload-report`, { method: 'POST', headers: { 'Authorization': `Bearer ${token}` }, body: formData, });
     },
+    getJob: (jobId, token) => {
+        return fetch(`${API_BASE_URL}/jobs/${jobId}`, { headers: { 'Authorization': `Bearer ${token}` }, });
+    },
     askAI: (consultationId, question, token) => {
         return fetch(`${API_BASE_URL}/consultations/${consultationId}/ask`, { method: 'POST', headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}`}, body: JSON.stringify({ question }), });
     },
@@ -47,6 +50,11 @@ const api = {
             headers: { 'Authorization': `Bearer ${token}` },
             body: formData,
         });
+    },
+    // Live scribe: stream audio chunks while recording; the note arrives when the socket is told to stop.
+    openLiveScribe: (consultationId, token) => {
+        const wsBaseUrl = API_BASE_URL.replace(/^http/, 'ws');
+        return new WebSocket(`${wsBaseUrl}/consultations/${consultationId}/scribe/live?token=${encodeURIComponent(token)}`);
     },
         // --- New Function for Phase 5 ---
     generateDdx: (consultationId, token) => {
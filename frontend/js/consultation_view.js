@@ -34,6 +34,7 @@ document.addEventListener('DOMContentLoaded', () => {
     let mediaRecorder;
     let audioChunks = [];
     let isRecording = false;
+    let liveSocket = null;
 
     if (!consultationId) {
         container.innerHTML = `<p class="text-red-500">No consultation ID provided.</p>`;
@@ -209,6 +210,16 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    async function waitForJob(jobId) {
+        while (true) {
+            const response = await api.getJob(jobId, token);
+            if (!response.ok) throw new Error('Could not fetch processing status.');
+            const job = await response.json();
+            if (job.status === 'done' || job.status === 'failed') return job;
+            await new Promise(resolve => setTimeout(resolve, 2000));
+        }
+    }
+
     uploadForm.addEventListener('submit', async (e) => {
         e.preventDefault();
         uploadStatus.textContent = 'Uploading and processing file... This may take a moment.';
@@ -218,10 +229,14 @@ document.addEventListener('DOMContentLoaded', () => {
         try {
             const response = await api.uploadReport(consultationId, file, token);
             if (!response.ok) throw new Error('Upload failed.');
-            await response.json();
+            const job = await response.json();
+            uploadForm.reset();
+            loadReports();
+            uploadStatus.textContent = `Uploaded ${file.name}. AI processing in progress...`;
+            const finishedJob = await waitForJob(job.id);
+            if (finishedJob.status === 'failed') throw new Error(`AI processing failed for ${file.name}.`);
             uploadStatus.textContent = `Successfully uploaded and processed ${file.name}!`;
             uploadStatus.className = 'text-green-600';
-            uploadForm.reset();
             loadReports();
         } catch (error) {
             uploadStatus.textContent = error.message;
@@ -301,7 +316,9 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             const data = await response.json();
             ddxResultDisplay.textContent = data.ddx_result;
-            ddxStatus.textContent = 'DDx report generated successfully!';
+            ddxStatus.textContent = data.cache_hit
+                ? 'Nothing has changed since the last DDx; showing the saved report.'
+                : 'DDx report generated successfully!';
             ddxStatus.className = 'text-green-600';
         } catch (error) {
             ddxStatus.textContent = `Error: ${error.message}`;
@@ -320,11 +337,16 @@ document.addEventListener('DOMContentLoaded', () => {
                 recordingStatus.textContent = 'Recording...';
                 mediaRecorder = new MediaRecorder(stream, { mimeType: 'audio/webm' });
                 audioChunks = [];
+                liveSocket = openLiveScribe();
                 mediaRecorder.ondataavailable = event => {
                     audioChunks.push(event.data);
+                    if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+                        liveSocket.send(event.data);
+                    }
                 };
                 mediaRecorder.onstop = processAudio;
-                mediaRecorder.start();
+                // Emit a chunk every few seconds so the live scribe can work during the visit.
+                mediaRecorder.start(5000);
             })
             .catch(err => {
                 recordingStatus.textContent = 'Could not start recording. Please allow microphone access.';
@@ -332,9 +354,49 @@ document.addEventListener('DOMContentLoaded', () => {
             });
     }
 
+    function openLiveScribe() {
+        const socket = api.openLiveScribe(consultationId, token);
+        // Set once the live note has arrived or the recording has been handed to the upload instead.
+        let settled = false;
+        const fallBackToUpload = reason => {
+            if (settled) {
+                return;
+            }
+            settled = true;
+            console.error(`Live scribe failed (${reason}); uploading the recording instead.`);
+            uploadRecording();
+        };
+        socket.onmessage = event => {
+            const message = JSON.parse(event.data);
+            if (message.type === 'update') {
+                if (isRecording) {
+                    recordingStatus.textContent = `Recording... (${Math.round(message.transcribed_seconds)}s transcribed)`;
+                }
+            } else if (message.type === 'note') {
+                settled = true;
+                soapNoteDisplay.value = message.soap_note;
+                recordingStatus.textContent = 'SOAP note generated successfully!';
+            } else if (message.type === 'error') {
+                // The browser still has the whole recording, so the regular upload can retry it.
+                fallBackToUpload(message.detail);
+            }
+        };
+        socket.onerror = () => {
+            console.error('Live scribe connection failed; the recording will be uploaded when it stops.');
+        };
+        socket.onclose = () => {
+            // If the socket closes while still recording, processAudio uploads the recording itself.
+            if (socket.stopSent) {
+                fallBackToUpload('connection closed before the note arrived');
+            }
+        };
+        return socket;
+    }
+
     function stopRecording() {
         if (mediaRecorder && mediaRecorder.state !== 'inactive') {
             mediaRecorder.stop();
+            mediaRecorder.stream.getTracks().forEach(track => track.stop());
             isRecording = false;
             recordBtn.innerHTML = `<i data-lucide="mic" class="h-5 w-5"></i><span>Start Recording</span>`;
             lucide.createIcons();
@@ -347,6 +409,17 @@ document.addEventListener('DOMContentLoaded', () => {
             recordingStatus.textContent = 'No audio was recorded.';
             return;
         }
+        if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+            // The last chunk was sent by ondataavailable, which fires before onstop.
+            recordingStatus.textContent = 'Finishing SOAP note...';
+            liveSocket.stopSent = true;
+            liveSocket.send('stop');
+            return;
+        }
+        await uploadRecording();
+    }
+
+    async function uploadRecording() {
         const audioBlob = new Blob(audioChunks, { type: 'audio/webm' });
         recordingStatus.textContent = 'Processing audio...';
         try {